@@ -1,5 +1,42 @@
+import pickle
+import sys
+import time
+from typing import Optional
+
+class _Budget:
+    """
+    Budget of one chunk of async operation
+
+    Chunk ends after `steps` steps or after `seconds` seconds,
+    whatever comes first (time budget is optional)
+    """
+    def __init__(self, steps: int = 1000, seconds: Optional[float] = None):
+        if steps < 1:
+            raise ValueError("Step budget must be positive!")
+
+        self._steps    = steps
+        self._seconds  = seconds
+        self._left     = steps
+        self._deadline = None if seconds is None else time.monotonic() + seconds
+
+    async def step(self) -> None:
+        """Spend one step, yield to event loop if chunk is over"""
+        self._left -= 1
+        if self._left > 0 and (self._deadline is None or time.monotonic() < self._deadline):
+            return
+
+        # asyncio is imported here, so importing module doesn't pay for it
+        import asyncio
+        await asyncio.sleep(0)
+
+        self._left = self._steps
+        if self._seconds is not None:
+            self._deadline = time.monotonic() + self._seconds
+
 class Node:
     """Node implementation for custom Hash table"""
+    __slots__ = ("key", "value", "next")
+
     def __init__(self, key, value):
         self.key   = key
         self.value = value
@@ -14,31 +51,33 @@ class HashTable:
         self._resize_threshold = 0.75
         self._resize_ratio     = 1.5
 
+        # Incremented on every modification, so async operations can
+        # detect that table was changed between their chunks
+        self._version          = 0
+
     #===================#
     # INTERFACE METHODS #
     #===================#
     def pop(self, key):
         """Removes the element with specified key and returns it"""
         ht_index = self._key_hash(key)
-        current = self._data[ht_index]
+        previous = None
+        current  = self._data[ht_index]
 
         while current:
-            # When current is the last element of chain
-            if current.next is None:
-                if current.key == key:
-                    saved_key = current.key
-                    current = None
-                    self._size -= 1
-                    return saved_key
-
-            # General case
-            elif current.next.key == key:
-                saved_key = current.next.key
-                current.next = current.next.next
+            if current.key == key:
+                # Unlink node from chain (head of chain has no previous node)
+                if previous is None:
+                    self._data[ht_index] = current.next
+                else:
+                    previous.next = current.next
+
                 self._size -= 1
-                return saved_key
+                self._version += 1
+                return current.key
 
-            current = current.next
+            previous = current
+            current  = current.next
 
         raise KeyError(f"{self.__class__.__name__}: pop: Unknown key: {key}")
 
@@ -79,12 +118,122 @@ class HashTable:
         """Get current capacity"""
         return self._capacity
 
+    def memory_usage(self, deep=True) -> int:
+        """
+        Get approximate amount of memory held by hash table in bytes.
+
+        Table object, bucket array and chain nodes are always accounted,
+        keys and values are accounted only if `deep` is True
+        """
+        total = sys.getsizeof(self) + self._object_dict_size(self) + \
+                sys.getsizeof(self._data)
+
+        for chain in self._data:
+            current = chain
+            while current:
+                total += sys.getsizeof(current) + self._object_dict_size(current)
+                if deep:
+                    total += sys.getsizeof(current.key) + sys.getsizeof(current.value)
+                current = current.next
+
+        return total
+
+    def dump(self, fileobj, chunk_size=4096) -> None:
+        """
+        Write pairs of table to binary file object
+
+        Pairs are pickled in lists of at most `chunk_size` pairs, so only
+        one chunk is held in memory. Empty list marks the end of stream
+        """
+        if chunk_size < 1:
+            raise ValueError(f"{self.__class__.__name__}: dump: Chunk size must be positive")
+
+        header = {"format": "HashTable", "version": 1, "size": self._size}
+        pickle.dump(header, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+
+        chunk = []
+        for chain in self._data:
+            current = chain
+            while current:
+                chunk.append((current.key, current.value))
+                if len(chunk) == chunk_size:
+                    pickle.dump(chunk, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+                    chunk = []
+                current = current.next
+
+        if chunk:
+            pickle.dump(chunk, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump([], fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, fileobj):
+        """Read table written by dump() chunk by chunk, only trusted files must be loaded"""
+        header = pickle.load(fileobj)
+        if not isinstance(header, dict) or header.get("format") != "HashTable":
+            raise ValueError(f"{cls.__name__}: load: Unknown format of dump")
+
+        # Capacity is chosen so that table is not resized during loading
+        table = cls(initial_capacity=max(8, int(header["size"] / 0.75) + 1))
+        while True:
+            chunk = pickle.load(fileobj)
+            if not chunk:
+                break
+
+            for key, value in chunk:
+                table[key] = value
+
+        return table
+
     def clear(self) -> None:
         """Removes all elements from the array"""
-        self._data.clear()
+        self._data = [None] * 8
 
         self._size     = 0
         self._capacity = 8
+        self._version += 1
+
+    #===============#
+    # ASYNC METHODS #
+    #===============#
+    # Long operations are split into chunks of `steps` nodes (and at most
+    # `seconds` seconds, if set) with yield to event loop after each chunk.
+    # RuntimeError is raised if table is modified between chunks.
+    async def aitems(self, steps=1000, seconds=None):
+        """Async iterator over key-value pairs"""
+        async for node in self._anodes(steps, seconds):
+            yield node.key, node.value
+
+    async def akeys(self, steps=1000, seconds=None):
+        """Async iterator over keys"""
+        async for node in self._anodes(steps, seconds):
+            yield node.key
+
+    async def aresize(self, capacity=None, steps=1000, seconds=None) -> None:
+        """
+        Async variant of resize, by default capacity grows as in automatic resize
+
+        New bucket array is filled with copies of nodes, so table stays
+        readable between chunks and is switched to new array at the end
+        """
+        if capacity is None:
+            capacity = int(self._capacity * self._resize_ratio)
+        if capacity < 1:
+            raise ValueError(f"{self.__class__.__name__}: aresize: Capacity must be positive")
+        # Like automatic resize, table must stay under its load factor
+        if self._size > self._resize_threshold * capacity:
+            raise ValueError(f"{self.__class__.__name__}: aresize: Capacity is too small")
+
+        new_data = [None] * capacity
+        async for node in self._anodes(steps, seconds):
+            ht_index = hash(node.key) % capacity
+
+            new_node = Node(node.key, node.value)
+            new_node.next = new_data[ht_index]
+            new_data[ht_index] = new_node
+
+        self._data     = new_data
+        self._capacity = capacity
+        self._version += 1
 
     #=================#
     # BACKEND METHODS #
@@ -98,19 +247,48 @@ class HashTable:
         data = self._data
 
         # Update capacity and empty data
-        self._size = 0
-        self._capacity = int(self._capacity * self._resize_ratio)
-        self._data = [None] * self._capacity
+        capacity = self._capacity = int(self._capacity * self._resize_ratio)
+        new_data = self._data = [None] * capacity
 
+        # Existing nodes are relinked into new chains instead of being
+        # inserted again: keys are known to be unique, so no chain lookups
+        # and no new node allocations are needed
         for chain in data:
             current = chain
             while current:
-                self[current.key] = current.value
+                next_node = current.next
+                ht_index = hash(current.key) % capacity
+
+                current.next = new_data[ht_index]
+                new_data[ht_index] = current
+                current = next_node
+
+    @staticmethod
+    def _object_dict_size(obj) -> int:
+        """Size of instance `__dict__`, 0 for objects without it"""
+        obj_dict = getattr(obj, "__dict__", None)
+        return 0 if obj_dict is None else sys.getsizeof(obj_dict)
+
+    async def _anodes(self, steps, seconds):
+        """Async iterator over nodes of all chains, yields to event loop between chunks"""
+        budget = _Budget(steps, seconds)
+        version = self._version
+
+        for chain in self._data:
+            current = chain
+            while current:
+                yield current
+                # Consumer of iterator can modify table too
+                self._check_version(version)
                 current = current.next
 
-    def _calc_current_fullness(self):
-        """Calculate current fullness of hash table 0..1"""
-        return self._size / self._capacity
+                await budget.step()
+                self._check_version(version)
+
+    def _check_version(self, version):
+        """Raise error if table was modified since `version`"""
+        if self._version != version:
+            raise RuntimeError(f"{self.__class__.__name__}: table changed during async operation")
 
     #===============#
     # MAGIC METHODS #
@@ -132,33 +310,34 @@ class HashTable:
 
     def __setitem__(self, key, value) -> None:
         """Set value by key, overload []"""
-        ht_index = self._key_hash(key)
+        # Hash is calculated inline to avoid method call on the hot path
+        ht_index = hash(key) % self._capacity
 
         # Get head of list which represents `ht_index` chain
-        if self._data[ht_index] is None:
-            self._data[ht_index] = Node(key, value)
-            self._size += 1
-        else:
-            current = self._data[ht_index]
-            while current:
-                # Replace existing value, if key already exist
-                if key == current.key:
-                    current.value = value
-                    return
-                current = current.next
+        head = self._data[ht_index]
+
+        current = head
+        while current is not None:
+            # Replace existing value, if key already exist
+            if key == current.key:
+                current.value = value
+                self._version += 1
+                return
+            current = current.next
 
-            # Create new node
-            new_node = Node(key, value)
-            new_node.next = self._data[ht_index]
-            self._data[ht_index] = new_node
-            self._size += 1
+        # Create new node in the head of chain
+        new_node = Node(key, value)
+        new_node.next = head
+        self._data[ht_index] = new_node
+        self._size += 1
+        self._version += 1
 
-        if self._calc_current_fullness() > self._resize_threshold:
+        if self._size > self._resize_threshold * self._capacity:
             self._resize()
         
     def __getitem__(self, key):
         """Get value by key, overload []"""
-        ht_index = self._key_hash(key)
+        ht_index = hash(key) % self._capacity
         current  = self._data[ht_index]
         
         # Search for given key value
@@ -173,12 +352,15 @@ class HashTable:
 
     def __contains__(self, key) -> bool:
         """Determine if hash table contain pair with key `key`"""
-        try:
-            # Reuse logic from __getitem__ method
-            self.__getitem__(key)
-            return True
-        except KeyError:
-            return False
+        # Chain is walked inline: raising and catching KeyError of
+        # __getitem__ costs more than the lookup itself for missing keys
+        current = self._data[hash(key) % self._capacity]
+        while current is not None:
+            if current.key == key:
+                return True
+            current = current.next
+
+        return False
 
 if __name__ == "__main__":
     ht = HashTable()
@@ -1,4 +1,9 @@
 from hash_table import HashTable
+import asyncio
+import io
+import os
+import subprocess
+import sys
 import unittest
 
 class TestHashTable(unittest.TestCase):
@@ -73,6 +78,19 @@ class TestHashTable(unittest.TestCase):
         with self.assertRaises(KeyError):
             self.ht.pop("nonexistent_key")
 
+    def test_pop_removes_key(self):
+        """Popped key must be unreachable, including heads of chains"""
+        for i in range(50):
+            self.ht[i] = i
+
+        for i in range(0, 50, 2):
+            self.ht.pop(i)
+
+        self.assertEqual(len(self.ht), 25)
+        self.assertEqual(len(self.ht.keys()), 25)
+        for i in range(50):
+            self.assertEqual(i in self.ht, i % 2 == 1)
+
     def test_items(self):
         """Get all key-value pairs"""
         self.ht["key1"] = "value1"
@@ -110,6 +128,11 @@ class TestHashTable(unittest.TestCase):
         self.assertEqual(self.ht._capacity, 8)
         self.assertEqual(self.ht._size, 0)
 
+        # Table is usable after clear
+        self.ht["key3"] = "value3"
+        self.assertEqual(self.ht["key3"], "value3")
+        self.assertEqual(len(self.ht), 1)
+
     def test_str(self):
         """Test of hash table string representation"""
         self.ht["key1"] = "value1"
@@ -119,5 +142,103 @@ class TestHashTable(unittest.TestCase):
         self.assertIn("key1: value1", str_repr)
         self.assertIn("key2: value2", str_repr)
 
+    def test_memory_usage(self):
+        """Memory usage accounts nodes, keys and values"""
+        empty_usage = self.ht.memory_usage()
+
+        for i in range(5):
+            self.ht[f"key{i}"] = "value" * 100
+
+        shallow_usage = self.ht.memory_usage(deep=False)
+        deep_usage = self.ht.memory_usage()
+        self.assertGreater(shallow_usage, empty_usage)
+        # Values are 500 characters long
+        self.assertGreater(deep_usage - shallow_usage, 5 * 500)
+
+    def test_dump_load(self):
+        """Table is restored from chunked dump"""
+        for i in range(100):
+            self.ht[f"key{i}"] = [i]
+
+        fileobj = io.BytesIO()
+        self.ht.dump(fileobj, chunk_size=7)
+        # Stream can contain other data after dump
+        fileobj.write(b"tail")
+        fileobj.seek(0)
+
+        loaded = HashTable.load(fileobj)
+        self.assertEqual(sorted(loaded.items()), sorted(self.ht.items()))
+        self.assertEqual(fileobj.read(), b"tail")
+
+        # Empty table
+        fileobj = io.BytesIO()
+        HashTable().dump(fileobj)
+        fileobj.seek(0)
+        self.assertEqual(len(HashTable.load(fileobj)), 0)
+
+        with self.assertRaises(ValueError):
+            self.ht.dump(io.BytesIO(), chunk_size=0)
+
+    def test_async_iteration(self):
+        """Async iterators give the same pairs as items() and keys()"""
+        for i in range(100):
+            self.ht[f"key{i}"] = i
+
+        async def run():
+            items = [pair async for pair in self.ht.aitems(steps=7)]
+            keys = [key async for key in self.ht.akeys(steps=7, seconds=0.01)]
+            return items, keys
+
+        items, keys = asyncio.run(run())
+        self.assertEqual(items, self.ht.items())
+        self.assertEqual(keys, self.ht.keys())
+
+    def test_import_side_effects(self):
+        """Importing hash tables neither imports asyncio nor changes sys.path"""
+        # Test runner has already imported asyncio, so check in a fresh interpreter
+        code = "import sys; path = list(sys.path); import hash_table, int_hash_table; " \
+               "print('asyncio' in sys.modules, sys.path == path)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.split(), ["False", "True"])
+
+    def test_aresize(self):
+        """Async resize keeps all pairs"""
+        for i in range(100):
+            self.ht[i] = str(i)
+        capacity = self.ht.capacity()
+
+        asyncio.run(self.ht.aresize(steps=10))
+        self.assertEqual(self.ht.capacity(), int(capacity * 1.5))
+        self.assertEqual(len(self.ht), 100)
+        for i in range(100):
+            self.assertEqual(self.ht[i], str(i))
+
+        asyncio.run(self.ht.aresize(capacity=1000))
+        self.assertEqual(self.ht.capacity(), 1000)
+        self.assertEqual(sorted(self.ht.keys()), list(range(100)))
+
+        # Capacity above load factor is rejected before table is changed
+        with self.assertRaises(ValueError):
+            asyncio.run(self.ht.aresize(capacity=3))
+        self.assertEqual(self.ht.capacity(), 1000)
+
+    def test_aresize_modification(self):
+        """Modification of table during async resize is an error"""
+        for i in range(100):
+            self.ht[i] = i
+
+        async def modify():
+            self.ht[1] = "new value"
+
+        async def run():
+            await asyncio.gather(self.ht.aresize(steps=10), modify())
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run())
+        # Table is not switched to partially filled array
+        self.assertEqual(self.ht[1], "new value")
+        self.assertEqual(len(self.ht.keys()), 100)
+
 if __name__ == "__main__":
     unittest.main()
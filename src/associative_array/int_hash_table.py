@@ -0,0 +1,465 @@
+import operator
+import sys
+from array import array
+
+from hash_table import HashTable, _Budget
+
+# States of slots
+EMPTY   = 0
+FULL    = 1
+DELETED = 2
+
+# Hash is calculated modulo 2^64, negative keys are taken in two's complement
+MASK64 = (1 << 64) - 1
+# 2^64 / golden ratio, multiplier of Fibonacci hashing
+GOLDEN = 0x9E3779B97F4A7C15
+
+def _import_numpy():
+    """Import numpy on first use, numpy is an optional dependency"""
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("Batch operations require numpy, install it with "
+                          "`pip install numpy`") from error
+
+    return numpy
+
+class IntHashTable:
+    """
+    Hash table for int keys and int or float values with typed array storage
+
+    Keys and values are stored unboxed in `array('q')` and `array('q')` or
+    `array('d')`, state of every slot is one byte of `bytearray`. Collisions
+    are resolved with open addressing (linear probing), slot of key is found
+    with Fibonacci hashing: high bits of `key * GOLDEN mod 2^64`.
+    """
+    def __init__(self, initial_capacity=8, value_type="q"):
+        if value_type not in ("q", "d"):
+            raise ValueError(f"{self.__class__.__name__}: Value type must be 'q' or 'd'")
+
+        self._value_type       = value_type
+        self._resize_threshold = 0.75
+        self._set_storage(*self._empty_storage(self._round_capacity(initial_capacity)))
+
+        self._size    = 0
+        # Same as HashTable._version
+        self._version = 0
+
+    #===================#
+    # INTERFACE METHODS #
+    #===================#
+    def pop(self, key):
+        """Removes the element with specified key and returns it"""
+        slot = self._find(key)
+        if slot < 0:
+            raise KeyError(f"{self.__class__.__name__}: pop: Unknown key: {key}")
+
+        # Slot is marked as deleted, so probe sequences going through it are not cut
+        self._state[slot] = DELETED
+        self._size    -= 1
+        self._deleted += 1
+        self._version += 1
+        return key
+
+    def get(self, key, default_value=None):
+        """Returns the value of the specified key"""
+        slot = self._find(key)
+        if slot < 0:
+            return default_value
+
+        return self._values[slot]
+
+    def items(self):
+        """Returns a list containing a tuple for each key value pair"""
+        keys, values = self._keys, self._values
+        return [(keys[slot], values[slot]) for slot in self._full_slots()]
+
+    def keys(self):
+        """Returns a list contatining the dictionary's keys"""
+        keys = self._keys
+        return [keys[slot] for slot in self._full_slots()]
+
+    def capacity(self):
+        """Get current capacity"""
+        return self._capacity
+
+    def memory_usage(self, deep=True) -> int:
+        """
+        Get approximate amount of memory held by hash table in bytes.
+
+        Keys and values are stored unboxed, so `deep` doesn't change the
+        result and is kept for compatibility with HashTable
+        """
+        return sys.getsizeof(self) + self._object_dict_size(self) + \
+               sys.getsizeof(self._keys) + sys.getsizeof(self._values) + \
+               sys.getsizeof(self._state)
+
+    def clear(self) -> None:
+        """Removes all elements from the array"""
+        self._set_storage(*self._empty_storage(8))
+
+        self._size     = 0
+        self._version += 1
+
+    def get_many(self, keys, default_value=0):
+        """
+        Vectorized get for array of keys, returns numpy array of values
+
+        Missing keys get `default_value`. All keys are probed together:
+        every round compares keys in current slots of unresolved queries
+        and moves the rest to next slots
+        """
+        np = _import_numpy()
+        queries = self._keys_many(np, keys, "get_many")
+
+        result = np.full(len(queries), default_value, dtype=self._value_dtype(np))
+        slots, found = self._probe_many(np, queries)
+        result[found] = np.frombuffer(self._values, dtype=result.dtype)[slots[found]]
+
+        return result
+
+    def set_many(self, keys, values) -> None:
+        """
+        Vectorized set for arrays of keys and values
+
+        Existing keys are updated in place, new keys are placed in rounds:
+        among new keys probing the same free slot the first one takes it,
+        others move to next slots. If key repeats, its last value is kept
+        """
+        np = _import_numpy()
+        new_keys = self._keys_many(np, keys, "set_many")
+        new_values = np.asarray(values).ravel()
+        if len(new_keys) != len(new_values):
+            raise ValueError(f"{self.__class__.__name__}: set_many: Keys and values must have the same length")
+        if len(new_keys) == 0:
+            return
+        # Like array('q'), int table doesn't truncate float values, ints are fine for float table
+        new_values = new_values.astype(self._value_dtype(np), casting="safe", copy=False)
+
+        # Keep last value of repeated keys: unique on reversed arrays gives last occurrences
+        new_keys, last = np.unique(new_keys[::-1], return_index=True)
+        new_values = new_values[::-1][last]
+
+        slots, found = self._probe_many(np, new_keys)
+        np.frombuffer(self._values, dtype=new_values.dtype)[slots[found]] = new_values[found]
+        self._version += 1
+
+        missing = ~found
+        new_keys, new_values = new_keys[missing], new_values[missing]
+        if len(new_keys) == 0:
+            return
+
+        size = self._size + len(new_keys)
+        if size + self._deleted > self._resize_threshold * self._capacity:
+            self._rebuild(self._round_capacity(int(size / self._resize_threshold) + 1))
+
+        table_keys = np.frombuffer(self._keys, dtype=np.int64)
+        table_values = np.frombuffer(self._values, dtype=new_values.dtype)
+        state = np.frombuffer(self._state, dtype=np.uint8)
+
+        # Keys are known to be absent, so deleted slots can be reused
+        slots = self._slots_many(np, new_keys)
+        pending = np.arange(len(new_keys))
+        while len(pending):
+            free = state[slots] != FULL
+            # First of keys probing the same free slot takes it
+            _, first = np.unique(np.where(free, slots, -1), return_index=True)
+            winners = first[free[first]]
+
+            taken = slots[winners]
+            self._deleted -= int(np.count_nonzero(state[taken] == DELETED))
+            state[taken] = FULL
+            table_keys[taken] = new_keys[pending[winners]]
+            table_values[taken] = new_values[pending[winners]]
+
+            left = np.ones(len(pending), dtype=bool)
+            left[winners] = False
+            pending, slots = pending[left], (slots[left] + 1) & self._mask
+
+        self._size = size
+
+    #===============#
+    # ASYNC METHODS #
+    #===============#
+    # Same as in HashTable: long operations are split into chunks of `steps`
+    # slots (and at most `seconds` seconds, if set) with yield to event loop
+    # after each chunk. RuntimeError is raised if table is modified between chunks.
+    async def aitems(self, steps=1000, seconds=None):
+        """Async iterator over key-value pairs"""
+        async for slot in self._aslots(steps, seconds):
+            yield self._keys[slot], self._values[slot]
+
+    async def akeys(self, steps=1000, seconds=None):
+        """Async iterator over keys"""
+        async for slot in self._aslots(steps, seconds):
+            yield self._keys[slot]
+
+    async def aresize(self, capacity=None, steps=1000, seconds=None) -> None:
+        """
+        Async variant of resize, by default capacity is doubled
+
+        New arrays are filled in chunks, so table stays readable between
+        chunks and is switched to new arrays at the end
+        """
+        if capacity is None:
+            capacity = self._capacity * 2
+        capacity = self._round_capacity(capacity)
+        if self._size > self._resize_threshold * capacity:
+            raise ValueError(f"{self.__class__.__name__}: aresize: Capacity is too small")
+
+        storage = self._empty_storage(capacity)
+        async for slot in self._aslots(steps, seconds):
+            self._place(storage, self._keys[slot], self._values[slot])
+
+        self._set_storage(*storage)
+        self._version += 1
+
+    #=================#
+    # BACKEND METHODS #
+    #=================#
+    @staticmethod
+    def _round_capacity(capacity):
+        """Round capacity up to power of two, slots are found by bit mask"""
+        if capacity < 1:
+            raise ValueError("IntHashTable: Capacity must be positive")
+
+        return max(8, 1 << (capacity - 1).bit_length())
+
+    def _empty_storage(self, capacity):
+        """Create empty arrays of keys, values and states of `capacity` slots"""
+        # Repetition fills arrays without temporary buffer of zero bytes
+        return array("q", [0]) * capacity, \
+               array(self._value_type, [0]) * capacity, \
+               bytearray(capacity)
+
+    def _set_storage(self, keys, values, state):
+        """Switch table to new arrays, they must not have deleted slots"""
+        capacity = len(state)
+
+        self._keys     = keys
+        self._values   = values
+        self._state    = state
+        self._capacity = capacity
+        self._mask     = capacity - 1
+        # Slot is given by log2(capacity) high bits of 64-bit product
+        self._shift    = 64 - (capacity.bit_length() - 1)
+        self._deleted  = 0
+
+    @staticmethod
+    def _place(storage, key, value):
+        """Put pair known to be absent into first empty slot of its probe sequence in `storage`"""
+        keys, values, state = storage
+        mask = len(state) - 1
+        slot = (key * GOLDEN & MASK64) >> (65 - len(state).bit_length())
+
+        while state[slot]:
+            slot = (slot + 1) & mask
+
+        state[slot]  = FULL
+        keys[slot]   = key
+        values[slot] = value
+
+    def _value_dtype(self, np):
+        """numpy dtype of values"""
+        return np.int64 if self._value_type == "q" else np.float64
+
+    @staticmethod
+    def _as_key(key):
+        """Convert key to int, None if object can't be a key of table"""
+        try:
+            return operator.index(key)
+        except TypeError:
+            return None
+
+    def _find(self, key):
+        """Find slot with `key`, -1 if there is no such key"""
+        # Like in HashTable, keys of other types are just not found
+        if type(key) is not int:
+            key = self._as_key(key)
+            if key is None:
+                return -1
+
+        state, keys, mask = self._state, self._keys, self._mask
+        slot = (key * GOLDEN & MASK64) >> self._shift
+
+        while True:
+            slot_state = state[slot]
+            if slot_state == EMPTY:
+                return -1
+            if slot_state == FULL and keys[slot] == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _full_slots(self):
+        """Iterate over indices of slots with keys without building list of them"""
+        for slot, slot_state in enumerate(self._state):
+            if slot_state == FULL:
+                yield slot
+
+    def _rebuild(self, capacity):
+        """Move all pairs to new arrays of `capacity` slots, deleted slots are dropped"""
+        keys, values = self._keys, self._values
+        storage = new_keys, new_values, new_state = self._empty_storage(capacity)
+        mask, shift = capacity - 1, 65 - capacity.bit_length()
+
+        # Keys are unique, so only empty slot has to be found for each of
+        # them. Loop of _place() is inlined, rebuild is on the hot path of set
+        for slot in self._full_slots():
+            key = keys[slot]
+            new_slot = (key * GOLDEN & MASK64) >> shift
+            while new_state[new_slot]:
+                new_slot = (new_slot + 1) & mask
+
+            new_state[new_slot]  = FULL
+            new_keys[new_slot]   = key
+            new_values[new_slot] = values[slot]
+
+        self._set_storage(*storage)
+
+    def _keys_many(self, np, keys, method):
+        """Convert batch of keys to int64 array, keys of other dtypes are not truncated"""
+        keys = np.asarray(keys).ravel()
+        if len(keys) == 0:
+            return keys.astype(np.int64)
+
+        if not np.issubdtype(keys.dtype, np.integer):
+            raise TypeError(f"{self.__class__.__name__}: {method}: Keys must have integer dtype, got {keys.dtype}")
+        if keys.dtype == np.uint64 and keys.max() > np.iinfo(np.int64).max:
+            raise OverflowError(f"{self.__class__.__name__}: {method}: Keys must fit into int64")
+
+        return keys.astype(np.int64, copy=False)
+
+    def _slots_many(self, np, keys):
+        """Vectorized Fibonacci hashing, uint64 multiplication wraps modulo 2^64"""
+        hashed = keys.astype(np.uint64) * np.uint64(GOLDEN)
+        return (hashed >> np.uint64(self._shift)).astype(np.int64)
+
+    def _probe_many(self, np, queries):
+        """Find slots of keys, returns slots and mask of found keys"""
+        table_keys = np.frombuffer(self._keys, dtype=np.int64)
+        state = np.frombuffer(self._state, dtype=np.uint8)
+
+        slots = self._slots_many(np, queries)
+        found = np.zeros(len(queries), dtype=bool)
+        pending = np.arange(len(queries))
+        while len(pending):
+            current = slots[pending]
+            current_state = state[current]
+
+            hit = (current_state == FULL) & (table_keys[current] == queries[pending])
+            found[pending[hit]] = True
+            # Probing stops on hit or on empty slot
+            go_on = ~hit & (current_state != EMPTY)
+
+            pending = pending[go_on]
+            slots[pending] = (slots[pending] + 1) & self._mask
+
+        return slots, found
+
+    async def _aslots(self, steps, seconds):
+        """Async iterator over full slots, yields to event loop between chunks"""
+        budget = _Budget(steps, seconds)
+        version = self._version
+
+        state = self._state
+        for slot in range(self._capacity):
+            if state[slot] != FULL:
+                continue
+
+            yield slot
+            # Consumer of iterator can modify table too
+            self._check_version(version)
+
+            await budget.step()
+            self._check_version(version)
+
+    # Helpers are shared with HashTable, they don't depend on storage of table
+    _object_dict_size = staticmethod(HashTable._object_dict_size)
+    _check_version    = HashTable._check_version
+
+    #===============#
+    # MAGIC METHODS #
+    #===============#
+    def __len__(self):
+        """Get size of hash table"""
+        return self._size
+
+    def __str__(self) -> str:
+        """Get string representation of hash table"""
+        return '{' + ", ".join(f"{key}: {value}" for key, value in self.items()) + '}'
+
+    def __setitem__(self, key, value) -> None:
+        """Set value by key, overload []"""
+        if type(key) is not int:
+            key = operator.index(key)
+
+        state, keys, mask = self._state, self._keys, self._mask
+        slot = (key * GOLDEN & MASK64) >> self._shift
+
+        # First deleted slot of probe sequence is reused for new key
+        free_slot = -1
+        while True:
+            slot_state = state[slot]
+            if slot_state == EMPTY:
+                break
+            if slot_state == FULL:
+                if keys[slot] == key:
+                    self._values[slot] = value
+                    self._version += 1
+                    return
+            elif free_slot < 0:
+                free_slot = slot
+            slot = (slot + 1) & mask
+
+        if free_slot >= 0:
+            slot = free_slot
+
+        # Arrays check type and range of key and value before slot is taken
+        keys[slot] = key
+        self._values[slot] = value
+        if state[slot] == DELETED:
+            self._deleted -= 1
+        state[slot] = FULL
+        self._size    += 1
+        self._version += 1
+
+        # Deleted slots make probe sequences longer, so they are counted too
+        if self._size + self._deleted > self._resize_threshold * self._capacity:
+            # Table of tombstones is cleaned up without growth
+            if self._size * 2 > self._resize_threshold * self._capacity:
+                self._rebuild(self._capacity * 2)
+            else:
+                self._rebuild(self._capacity)
+
+    def __getitem__(self, key):
+        """Get value by key, overload []"""
+        if type(key) is not int:
+            slot = self._find(key)
+            if slot < 0:
+                raise KeyError(f"{self.__class__.__name__}: __getitem__: Unknown key: {key}")
+            return self._values[slot]
+
+        # Probing of int keys is inlined to avoid method call on the hot path
+        state, keys, mask = self._state, self._keys, self._mask
+        slot = (key * GOLDEN & MASK64) >> self._shift
+
+        while True:
+            slot_state = state[slot]
+            if slot_state == FULL and keys[slot] == key:
+                return self._values[slot]
+            if slot_state == EMPTY:
+                raise KeyError(f"{self.__class__.__name__}: __getitem__: Unknown key: {key}")
+            slot = (slot + 1) & mask
+
+    def __contains__(self, key) -> bool:
+        """Determine if hash table contain pair with key `key`"""
+        return self._find(key) >= 0
+
+if __name__ == "__main__":
+    ht = IntHashTable(value_type="d")
+
+    for i in range(30):
+        ht[i * 1000] = i / 2
+
+    print(len(ht), ht.capacity())
+    print(ht)
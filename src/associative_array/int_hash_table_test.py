@@ -0,0 +1,205 @@
+from int_hash_table import IntHashTable
+import asyncio
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestIntHashTable(unittest.TestCase):
+    def setUp(self):
+        """Initialize hash table before each test"""
+        self.ht = IntHashTable()
+
+    def test_initialization(self):
+        """Initialization test"""
+        self.assertEqual(len(self.ht), 0)
+        self.assertEqual(self.ht.capacity(), 8)
+
+        # Capacity is rounded up to power of two
+        self.assertEqual(IntHashTable(initial_capacity=19).capacity(), 32)
+        with self.assertRaises(ValueError):
+            IntHashTable(value_type="s")
+
+    def test_setitem_and_getitem(self):
+        """Get and set element test"""
+        for i in range(100):
+            self.ht[i * 7919] = i
+
+        self.assertEqual(len(self.ht), 100)
+        for i in range(100):
+            self.assertEqual(self.ht[i * 7919], i)
+
+        # Change value by key
+        self.ht[0] = -5
+        self.assertEqual(self.ht[0], -5)
+        self.assertEqual(len(self.ht), 100)
+
+        # Negative and big keys
+        self.ht[-1] = 1
+        self.ht[2**62] = 2
+        self.assertEqual(self.ht[-1], 1)
+        self.assertEqual(self.ht[2**62], 2)
+
+        with self.assertRaises(KeyError):
+            _ = self.ht[12345]
+        with self.assertRaises(OverflowError):
+            self.ht[2**64] = 0
+
+    def test_keys_of_other_types(self):
+        """Keys which are not ints are not found, like in HashTable"""
+        self.ht[3] = 30
+
+        self.assertNotIn("x", self.ht)
+        self.assertNotIn(None, self.ht)
+        self.assertEqual(self.ht.get("x", -1), -1)
+        self.assertEqual(self.ht.get(3.5), None)
+        with self.assertRaises(KeyError):
+            _ = self.ht["x"]
+        with self.assertRaises(KeyError):
+            self.ht.pop("x")
+        with self.assertRaises(TypeError):
+            self.ht["x"] = 1
+
+        # Objects with __index__ work as their int values
+        self.ht[True] = 10
+        self.assertEqual(self.ht[1], 10)
+        self.assertEqual(len(self.ht), 2)
+        if numpy is not None:
+            self.assertEqual(self.ht[numpy.int64(3)], 30)
+            self.assertIn(numpy.uint8(1), self.ht)
+
+    def test_float_values(self):
+        """Table with float values"""
+        ht = IntHashTable(value_type="d")
+        ht[1] = 0.5
+        ht[2] = 3
+
+        self.assertEqual(ht[1], 0.5)
+        self.assertEqual(ht.get(2), 3.0)
+        self.assertIn("1: 0.5", str(ht))
+        self.assertIn("2: 3.0", str(ht))
+
+    def test_pop(self):
+        """Popped keys are unreachable, other keys stay reachable through deleted slots"""
+        for i in range(50):
+            self.ht[i] = i
+
+        for i in range(0, 50, 2):
+            self.assertEqual(self.ht.pop(i), i)
+
+        self.assertEqual(len(self.ht), 25)
+        for i in range(50):
+            self.assertEqual(i in self.ht, i % 2 == 1)
+            self.assertEqual(self.ht.get(i, -1), i if i % 2 else -1)
+        with self.assertRaises(KeyError):
+            self.ht.pop(0)
+
+        # Deleted slots are reused
+        for i in range(0, 50, 2):
+            self.ht[i] = -i
+        self.assertEqual(len(self.ht), 50)
+        self.assertEqual(sorted(self.ht.items()), sorted((i, -i if i % 2 == 0 else i) for i in range(50)))
+
+    def test_many_deletions(self):
+        """Deleted slots don't fill up the table"""
+        for i in range(10000):
+            self.ht[i] = i
+            self.ht.pop(i)
+
+        self.assertEqual(len(self.ht), 0)
+        self.assertLessEqual(self.ht.capacity(), 16)
+
+    def test_clear(self):
+        """Clear hash table test"""
+        for i in range(100):
+            self.ht[i] = i
+
+        self.ht.clear()
+        self.assertEqual(len(self.ht), 0)
+        self.assertEqual(self.ht.capacity(), 8)
+        self.assertEqual(self.ht.keys(), [])
+
+        self.ht[3] = 3
+        self.assertEqual(self.ht[3], 3)
+
+    def test_memory_usage(self):
+        """Memory usage is a few bytes per slot"""
+        for i in range(1000):
+            self.ht[i] = i
+
+        # 8 bytes of key, 8 bytes of value and 1 byte of state per slot
+        usage = self.ht.memory_usage()
+        self.assertGreaterEqual(usage, 17 * self.ht.capacity())
+        self.assertLess(usage, 17 * self.ht.capacity() + 4096)
+
+    def test_async_operations(self):
+        """Async iterators and resize keep all pairs"""
+        for i in range(100):
+            self.ht[i] = i * 2
+
+        async def run():
+            items = [pair async for pair in self.ht.aitems(steps=7)]
+            await self.ht.aresize(capacity=1000, steps=10)
+            keys = [key async for key in self.ht.akeys(steps=7, seconds=0.01)]
+            return items, keys
+
+        items, keys = asyncio.run(run())
+        self.assertEqual(sorted(items), [(i, i * 2) for i in range(100)])
+        self.assertEqual(self.ht.capacity(), 1024)
+        self.assertEqual(sorted(keys), list(range(100)))
+        self.assertEqual(self.ht[99], 198)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_batch_operations(self):
+        """Vectorized get and set agree with scalar operations"""
+        self.ht[5] = 50
+        self.ht.pop(5)
+        self.ht[7] = 70
+
+        keys = numpy.array([1, 2, 3, 2, 7, 2**40, -3])
+        self.ht.set_many(keys, numpy.arange(len(keys)))
+
+        # Last value of repeated key is kept
+        self.assertEqual(self.ht[2], 3)
+        self.assertEqual(self.ht[7], 4)
+        self.assertEqual(self.ht[-3], 6)
+        self.assertEqual(len(self.ht), 6)
+
+        values = self.ht.get_many([1, 5, 2**40, 100], default_value=-1)
+        self.assertEqual(values.tolist(), [0, -1, 5, -1])
+
+        big = numpy.arange(0, 30000, 3)
+        self.ht.set_many(big, big * 2)
+        self.assertEqual(len(self.ht), 6 + 10000 - 1)
+        self.assertTrue((self.ht.get_many(big) == big * 2).all())
+        self.assertEqual(self.ht[2997], 5994)
+
+        float_table = IntHashTable(value_type="d")
+        float_table.set_many([1, 2], [0.25, 0.5])
+        self.assertEqual(float_table.get_many([2, 3], default_value=numpy.nan)[0], 0.5)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_batch_operations_reject_truncation(self):
+        """Float keys and values are rejected by int table instead of being truncated"""
+        with self.assertRaises(TypeError):
+            self.ht.set_many(numpy.array([1.9, 2.5]), numpy.array([7, 3]))
+        with self.assertRaises(TypeError):
+            self.ht.set_many(numpy.array([1, 2]), numpy.array([7.9, 3.2]))
+        with self.assertRaises(TypeError):
+            self.ht.get_many(numpy.array([1.0]))
+        with self.assertRaises(OverflowError):
+            self.ht.get_many(numpy.array([2**63], dtype=numpy.uint64))
+        self.assertEqual(len(self.ht), 0)
+
+        self.ht.set_many([], [])
+        self.assertEqual(self.ht.get_many([]).tolist(), [])
+
+        # Float table takes int values
+        float_table = IntHashTable(value_type="d")
+        float_table.set_many(numpy.array([1, 2], dtype=numpy.uint8), numpy.array([3, 4]))
+        self.assertEqual(float_table.get_many([1, 2]).tolist(), [3.0, 4.0])
+
+if __name__ == "__main__":
+    unittest.main()
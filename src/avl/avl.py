@@ -1,25 +1,113 @@
 from typing import List, Optional
-import queue
+from array import array
+from collections import deque
+import bisect
 import copy
+import itertools
+import math
+import operator
+import pickle
+import sys
+import time
+
+
+class _Budget:
+    """
+    Budget of one chunk of async operation
+
+    Chunk ends after `steps` steps or after `seconds` seconds,
+    whatever comes first (time budget is optional)
+    """
+    def __init__(self, steps: int = 1000, seconds: Optional[float] = None):
+        if steps < 1:
+            raise ValueError("Step budget must be positive!")
+
+        self._steps    = steps
+        self._seconds  = seconds
+        self._left     = steps
+        self._deadline = None if seconds is None else time.monotonic() + seconds
+
+    async def step(self) -> None:
+        """Spend one step, yield to event loop if chunk is over"""
+        self._left -= 1
+        if self._left > 0 and (self._deadline is None or time.monotonic() < self._deadline):
+            return
+
+        # asyncio is imported here, so importing module doesn't pay for it
+        import asyncio
+        await asyncio.sleep(0)
+
+        self._left = self._steps
+        if self._seconds is not None:
+            self._deadline = time.monotonic() + self._seconds
+
+
+def _import_numpy():
+    """Import numpy on first use, numpy is an optional dependency"""
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("Batch operations require numpy, install it with "
+                          "`pip install numpy`") from error
+
+    return numpy
+
+
+# Keys are stored as int64 by dump() and keys_buffer()
+INT64_MAX = (1 << 63) - 1
+
 
 class AVL:
     class Node:
         """Node for AVL tree class implementation"""
+        # Slots remove per-node __dict__, which halves memory used by nodes
+        __slots__ = ("key", "left", "right", "height")
+
         def __init__(self, key: int, left: Optional['AVL.Node'] = None, right: Optional['AVL.Node'] = None):
             self.key = key
             self.left = left
             self.right = right
             self.height = 1
 
-    def __init__(self):
+    def __init__(self, debug: bool = False):
         self._root   = None
         
         # Used to access size in O(1)
         self._size = 0
 
+        # Sorted numpy array of keys for batch operations,
+        # built lazily and dropped on every modification of tree
+        self._keys_array = None
+
+        # Incremented on every modification, used by async operations
+        # to detect that tree was changed between their chunks
+        self._version = 0
+
+        # Cached leftmost and rightmost nodes for O(1) min() and max()
+        self._min_node = None
+        self._max_node = None
+
+        # In debug mode nodes rebalanced by mutation are collected here and
+        # checked after it, so invariants are verified in O(log(n)) per
+        # mutation instead of O(n). None when debug mode is off
+        self._touched = [] if debug else None
+
     #=========================#
     # CLASS INTERFACE METHODS #
     #=========================#
+    @classmethod
+    def from_sorted(cls, keys: List[int], debug: bool = False) -> 'AVL':
+        """Build perfectly balanced tree from sorted list of keys in O(n)"""
+        if keys and keys[0] < 0:
+            raise ValueError("Element of tree must be natural number!")
+
+        tree = cls(debug=debug)
+        tree._root = tree._run_build(keys, 0, len(keys))
+        tree._size = len(keys)
+        tree._refresh_bounds()
+
+        return tree
+
     def height(self) -> int:
         """Get height of tree"""
         return self._height(self._root)
@@ -29,35 +117,40 @@ class AVL:
         if key < 0:
             raise ValueError("Element of tree must be natural number!")
 
+        # Cached min and max nodes are updated by _run_insert itself
         self._root = self._run_insert(self._root, key)
+        self._modified(bounds_changed=False)
 
     def remove(self, key: int) -> None:
         """Remove specified element from tree"""
         self._root = self._run_remove(self._root, key)
+        self._modified()
 
     def remove_min(self) -> None:
         """Remove min element from tree"""
-        self._root = self._run_remove_min(self._root)
+        if self._root is not None:
+            self._run_pop_edge(leftmost=True)
+            self._modified(bounds_changed=False)
 
     def remove_max(self) -> None:
         """Remove max element from tree"""
-        self._root = self._run_remove_max(self._root)
+        if self._root is not None:
+            self._run_pop_edge(leftmost=False)
+            self._modified(bounds_changed=False)
 
     def min(self) -> int:
-        """Get min element in tree"""
-        min_node = self._min(self._root)
-        if min_node is None:
+        """Get min element in tree in O(1)"""
+        if self._min_node is None:
             raise ValueError("AVL tree is empty!")
         
-        return min_node.key
+        return self._min_node.key
 
     def max(self) -> int:
-        """Get max element in tree"""
-        max_node = self._max(self._root)
-        if max_node is None:
+        """Get max element in tree in O(1)"""
+        if self._max_node is None:
             raise ValueError("AVL tree is empty!")
         
-        return max_node.key
+        return self._max_node.key
 
     def data(self, order: str="in") -> List[int]:
         """Get elements of tree in specified order"""
@@ -82,6 +175,48 @@ class AVL:
         """Count amount elements with key `key` in tree"""
         return self._run_count(self._root, key)
 
+    def range(self, lo: int, hi: int) -> List[int]:
+        """Get sorted keys `k` such that lo <= k < hi"""
+        keys = []
+        stack = []
+        current = self._root
+
+        # In-order traversal which skips subtrees outside of range
+        while stack or current is not None:
+            while current is not None:
+                stack.append(current)
+                # Equal keys can be placed in left subtree after rotations
+                current = current.left if current.key >= lo else None
+
+            node = stack.pop()
+            if lo <= node.key < hi:
+                keys.append(node.key)
+
+            current = node.right if node.key < hi else None
+
+        return keys
+
+    def rank(self, key: int) -> int:
+        """
+        Count keys less than `key`
+
+        Tree doesn't store sizes of subtrees, so keys are counted from both
+        ends of in-order sequence at once, it takes O(log(n) + min(r, n - r))
+        for rank r instead of O(r)
+        """
+        ascending  = self._iter_in_order(self._root)
+        descending = self._iter_in_order(self._root, reverse=True)
+
+        for counted, (low, high) in enumerate(zip(ascending, descending)):
+            # `counted` smallest keys are less than `key`
+            if low >= key:
+                return counted
+            # `counted` greatest keys are not less than `key`
+            if high < key:
+                return self._size - counted
+
+        return self._size
+
     def size(self) -> int:
         """Return size of tree"""
         return self._size
@@ -90,28 +225,407 @@ class AVL:
         """Splits tree at given key"""
         avl_copy = copy.deepcopy(self)
         
-        left_tree, right_tree = AVL(), AVL()
-        left, right = self._run_split(avl_copy._root, key)
+        # Trees derived from debug tree keep checking invariants
+        debug = self._touched is not None
+        left_tree, right_tree = AVL(debug=debug), AVL(debug=debug)
+        left, right = self._run_split(avl_copy._root, key, False)
+
+        # One instance of `key` is not included in any of trees
+        if right is not None and self._min(right).key == key:
+            right = self._run_detach_min(right)
 
         # Update root pointers
         left_tree._root, right_tree._root = left, right
+        left_tree._size  = self._run_count_size(left)
+        right_tree._size = self._run_count_size(right)
+        left_tree._refresh_bounds()
+        right_tree._refresh_bounds()
+        # Joins were done by this tree, so it collected their nodes
+        if self._touched:
+            self._check_touched()
 
         return (left_tree, right_tree)
 
-    def validate(self):
-        """Validate tree structure"""
-        return self._run_validate_AVL_BST(self._root) and \
-               self._size == len(self.data())
+    def remove_range(self, lo: int, hi: int) -> int:
+        """
+        Remove all keys `k` such that lo <= k < hi, returns amount of removed keys
+
+        Range is cut out with two splits and one join in O(log(n)),
+        only counting of removed keys takes O(k)
+        """
+        if lo >= hi or self._root is None:
+            return 0
+
+        left, rest = self._run_split(self._root, lo, False)
+        middle, right = self._run_split(rest, hi, False)
+
+        removed = self._run_count_size(middle)
+        self._root = self._run_concat(left, right)
+        self._size -= removed
+        self._modified()
+
+        return removed
+
+    def pop_min(self, n: Optional[int] = None):
+        """
+        Remove and return min element, or list of `n` min elements in ascending order
+
+        Single element is removed with one descent along left spine.
+        Removed keys are collected by in-order traversal and cut out
+        with one split, so it takes O(log(n) + n) instead of n removals
+        """
+        if n is None:
+            if self._root is None:
+                raise ValueError("AVL tree is empty!")
+
+            key = self._run_pop_edge(leftmost=True)
+            self._modified(bounds_changed=False)
+            return key
+
+        keys = list(itertools.islice(self._iter_in_order(self._root), max(n, 0)))
+        if not keys:
+            return keys
+
+        # Keys less than boundary are removed with split, instances of boundary
+        # key are removed one by one, because tree can hold more of them
+        boundary = keys[-1]
+        boundary_count = len(keys) - bisect.bisect_left(keys, boundary)
+
+        _, self._root = self._run_split(self._root, boundary, False)
+        self._size -= len(keys) - boundary_count
+        for _ in range(boundary_count):
+            self._root = self._run_remove(self._root, boundary)
+        self._modified()
+
+        return keys
+
+    def pop_max(self, n: Optional[int] = None):
+        """Remove and return max element, or list of `n` max elements in descending order"""
+        if n is None:
+            if self._root is None:
+                raise ValueError("AVL tree is empty!")
+
+            key = self._run_pop_edge(leftmost=False)
+            self._modified(bounds_changed=False)
+            return key
+
+        keys = list(itertools.islice(self._iter_in_order(self._root, reverse=True), max(n, 0)))
+        if not keys:
+            return keys
+
+        # Same as in pop_min(), but mirrored
+        boundary = keys[-1]
+        boundary_count = keys.count(boundary)
+
+        self._root, _ = self._run_split(self._root, boundary, True)
+        self._size -= len(keys) - boundary_count
+        for _ in range(boundary_count):
+            self._root = self._run_remove(self._root, boundary)
+        self._modified()
+
+        return keys
+
+    def validate(self) -> bool:
+        """Validate key order, heights, balance and size of tree in one O(n) pass"""
+        return all(self._iter_validate(self._root, self._size))
+
+    def contains_many(self, keys) -> 'numpy.ndarray':
+        """
+        Vectorized `in` for array of keys, returns boolean numpy array
+
+        Queries are answered with `numpy.searchsorted` over sorted array
+        of tree keys, which is rebuilt only after the tree was changed
+        """
+        np = _import_numpy()
+        sorted_keys = self._sorted_keys_array()
+        queries = np.asarray(keys)
+
+        if len(sorted_keys) == 0:
+            return np.zeros(queries.shape, dtype=bool)
+
+        # Positions past the end are clipped to the last key, which
+        # is less than such queries, so they are not found anyway
+        positions = np.searchsorted(sorted_keys, queries, side="left")
+        positions = np.minimum(positions, len(sorted_keys) - 1)
+
+        return sorted_keys[positions] == queries
+
+    def count_many(self, keys) -> 'numpy.ndarray':
+        """Vectorized `count` for array of keys, returns numpy array of counts"""
+        np = _import_numpy()
+        sorted_keys = self._sorted_keys_array()
+        queries = np.asarray(keys)
+
+        return np.searchsorted(sorted_keys, queries, side="right") - \
+               np.searchsorted(sorted_keys, queries, side="left")
+
+    def insert_many(self, keys) -> None:
+        """
+        Insert array of keys
+
+        Small batches are inserted one by one. Big batches are merged with
+        sorted keys of tree and the tree is rebuilt from merged array in
+        O(n + m), which is cheaper than m insertions with rebalancing
+        """
+        np = _import_numpy()
+        new_keys = np.asarray(keys).ravel()
+        if len(new_keys) == 0:
+            return
+        # Casting floats to int64 would silently truncate keys
+        if not np.issubdtype(new_keys.dtype, np.integer):
+            raise ValueError(f"Batch of keys must have integer dtype, got {new_keys.dtype}!")
+        if new_keys.min() < 0:
+            raise ValueError("Element of tree must be natural number!")
+        if new_keys.max() > np.iinfo(np.int64).max:
+            raise ValueError("Batch of keys must fit into int64!")
+        new_keys = new_keys.astype(np.int64, copy=False)
+
+        if len(new_keys) * math.log2(self._size + 2) < self._size:
+            for key in new_keys.tolist():
+                self.insert(key)
+            return
+
+        merged = np.concatenate((self._sorted_keys_array(), new_keys))
+        merged.sort(kind="stable")
+
+        self._root = self._run_build(merged.tolist(), 0, len(merged))
+        self._size = len(merged)
+        self._modified()
+        # Merged array is exactly the array of keys of new tree
+        self._keys_array = merged
+
+    def memory_usage(self, deep: bool = True) -> int:
+        """
+        Get approximate amount of memory held by tree in bytes.
+
+        Tree object and all nodes are always accounted, keys are accounted
+        only if `deep` is True. Shared objects (e.g. small ints cached by
+        interpreter) are counted once per reference.
+        """
+        total = sys.getsizeof(self) + self._object_dict_size(self)
+        if self._keys_array is not None:
+            total += sys.getsizeof(self._keys_array)
+
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            total += sys.getsizeof(node) + self._object_dict_size(node)
+            if deep:
+                total += sys.getsizeof(node.key)
+
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+
+        return total
+
+    def keys_buffer(self) -> memoryview:
+        """
+        Get sorted keys as read-only memoryview over array('q')
+
+        Consumers (e.g. numpy.frombuffer) read keys from buffer directly,
+        without Python object per key. Keys must fit into int64
+        """
+        return memoryview(self._int64_keys()).toreadonly()
+
+    def dump(self, fileobj, chunk_size: int = 65536) -> None:
+        """
+        Write tree to binary file object
+
+        Pickled header is followed by sorted keys as raw int64 chunks of at
+        most `chunk_size` keys, so memory used by dump doesn't depend on
+        size of tree. Keys must fit into int64
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive!")
+        # All keys are checked before header is written, so stream isn't left half-written
+        self._check_int64_keys()
+
+        header = {"format": "AVL", "version": 1, "size": self._size,
+                  "byteorder": sys.byteorder}
+        pickle.dump(header, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+
+        keys = self._iter_in_order(self._root)
+        while True:
+            chunk = array("q", itertools.islice(keys, chunk_size))
+            if not chunk:
+                break
+            chunk.tofile(fileobj)
+
+    @classmethod
+    def load(cls, fileobj, chunk_size: int = 65536, debug: bool = False) -> 'AVL':
+        """
+        Read tree written by dump(), only trusted files must be loaded
+
+        Keys are read in chunks of at most `chunk_size` keys and balanced
+        tree is built directly from the stream in O(n)
+        """
+        header = pickle.load(fileobj)
+        if not isinstance(header, dict) or header.get("format") != "AVL":
+            raise ValueError("Unknown format of AVL dump!")
+
+        keys = cls._read_dump_keys(fileobj, header["size"], header["byteorder"], chunk_size)
+
+        tree = cls(debug=debug)
+        tree._root = tree._run_build_from_iter(keys, header["size"])
+        tree._size = header["size"]
+        tree._refresh_bounds()
+
+        return tree
 
     def clear(self) -> None:
-        """Empty tree"""
+        """Empty tree in O(1), nodes are freed by garbage collector"""
         self._size = 0
         self._root = None
-        self._run_clear(self._root)
+        self._modified()
+
+    #===============#
+    # ASYNC METHODS #
+    #===============#
+    # Async variants do the work in chunks of at most `steps` nodes or
+    # `seconds` seconds and yield to event loop between chunks. Tree must
+    # not be modified while they run, otherwise RuntimeError is raised.
+    async def aiter(self, steps: int = 1000, seconds: Optional[float] = None):
+        """Async iterator over keys of tree in order"""
+        budget = _Budget(steps, seconds)
+        version = self._version
+
+        stack = []
+        current = self._root
+        while stack or current is not None:
+            while current is not None:
+                stack.append(current)
+                current = current.left
+
+            node = stack.pop()
+            yield node.key
+            # Consumer of iterator can modify tree too
+            self._check_version(version)
+            current = node.right
+
+            await budget.step()
+            self._check_version(version)
+
+    async def adata(self, steps: int = 1000, seconds: Optional[float] = None) -> List[int]:
+        """Async variant of data(), returns keys in order"""
+        return [key async for key in self.aiter(steps, seconds)]
+
+    async def avalidate(self, steps: int = 1000, seconds: Optional[float] = None) -> bool:
+        """Async variant of validate()"""
+        budget = _Budget(steps, seconds)
+        version = self._version
+
+        for valid in self._iter_validate(self._root, self._size):
+            if not valid:
+                return False
+
+            await budget.step()
+            self._check_version(version)
+
+        return True
+
+    async def amerge(self, other: Optional['AVL'], steps: int = 1000,
+                     seconds: Optional[float] = None) -> 'AVL':
+        """Async variant of + operator, source trees are not changed"""
+        budget = _Budget(steps, seconds)
+        version = self._version
+        new_avl = AVL(debug=self._touched is not None)
+
+        # Copy tree node by node, pairs are (source node, copied node)
+        if self._root is not None:
+            new_avl._root = self.Node(self._root.key)
+            stack = [(self._root, new_avl._root)]
+            while stack:
+                node, new_node = stack.pop()
+                new_node.height = node.height
+                if node.left is not None:
+                    new_node.left = self.Node(node.left.key)
+                    stack.append((node.left, new_node.left))
+                if node.right is not None:
+                    new_node.right = self.Node(node.right.key)
+                    stack.append((node.right, new_node.right))
+
+                await budget.step()
+                self._check_version(version)
+
+            new_avl._size = self._size
+            new_avl._refresh_bounds()
+
+        if other is not None:
+            async for key in other.aiter(steps, seconds):
+                new_avl.insert(key)
+
+        return new_avl
 
     #=======================#
     # CLASS BACKEND METHODS #
     #=======================#
+    def _modified(self, bounds_changed: bool = True) -> None:
+        """
+        Drop caches and update version after modification of tree
+
+        Cached min and max nodes are found again unless modification
+        has already updated them (`bounds_changed` is False)
+        """
+        self._keys_array = None
+        self._version += 1
+        if bounds_changed:
+            self._refresh_bounds()
+        if self._touched:
+            self._check_touched()
+
+    def _refresh_bounds(self) -> None:
+        """Find min and max nodes of tree in O(log(n))"""
+        self._min_node = self._min(self._root)
+        self._max_node = self._max(self._root)
+
+    def _check_version(self, version: int) -> None:
+        """Raise error if tree was modified since `version`"""
+        if self._version != version:
+            raise RuntimeError("AVL tree changed during async operation")
+
+    def _is_valid_node(self, node: Node) -> bool:
+        """Check BST order with children, height and AVL balance of one node"""
+        left, right = node.left, node.right
+        # Left child has greater value than parent
+        if left is not None and node.key < left.key:
+            return False
+        # Right child has less value than parent
+        if right is not None and node.key > right.key:
+            return False
+
+        left_height  = left.height if left is not None else 0
+        right_height = right.height if right is not None else 0
+        if node.height != (left_height if left_height > right_height else right_height) + 1:
+            return False
+
+        return -2 < right_height - left_height < 2
+
+    def _check_int64_keys(self) -> None:
+        """
+        Raise error if some key can't be stored as int64, takes O(n)
+
+        Keys are natural, so range is checked by max key only,
+        and only keys which aren't plain ints are converted
+        """
+        if self._max_node is not None and self._max_node.key > INT64_MAX:
+            raise ValueError("Keys of tree must fit into int64!")
+
+        for key in self._iter_in_order(self._root):
+            if type(key) is not int:
+                try:
+                    operator.index(key)
+                except TypeError:
+                    raise ValueError(f"Keys of tree must be ints to be stored as int64: {key!r}") from None
+
+    def _check_touched(self) -> None:
+        """Check nodes collected in debug mode, raise error on broken node"""
+        touched, self._touched = self._touched, []
+        for node in touched:
+            if not self._is_valid_node(node):
+                raise RuntimeError(f"AVL tree invariant is broken at node with key {node.key}")
+
     def _height(self, node: Optional[Node]) -> int:
         """Backend function to get height of tree"""
         if node is None:
@@ -119,22 +633,14 @@ class AVL:
 
         return node.height
 
-    def _recalc_height(self, node: Node) -> None:
-        """Function to recalculate height of specified node"""
-        if node is None:
-            return
-        
-        node.height = 1 + max(self._height(node.left),
-                              self._height(node.right))
-
-    def _calc_bfactor(self, node: Node) -> int:
-        """Function to calculate balance factor of current node"""
-        if node is None:
-            return 0
-        return self._height(node.right) - self._height(node.left)
+    @staticmethod
+    def _object_dict_size(obj) -> int:
+        """Size of instance `__dict__`, 0 for objects without it"""
+        obj_dict = getattr(obj, "__dict__", None)
+        return 0 if obj_dict is None else sys.getsizeof(obj_dict)
 
     def _run_left_rotation(self, rotate_root: Node) -> Node:
-        """
+        r"""
         Function to do left rotation in rotate_node.
  
         We have tree like this (balance factor in brackets):
@@ -153,12 +659,23 @@ class AVL:
         
         new_root = rotate_root.right
         old_new_root_left = new_root.left
+        if self._touched is not None:
+            self._touched.append(new_root)
+            self._touched.append(rotate_root)
 
         new_root.left = rotate_root
-        new_root.left.right = old_new_root_left
+        rotate_root.right = old_new_root_left
 
-        self._recalc_height(rotate_root)
-        self._recalc_height(new_root)
+        # Heights are recalculated inline: rotation is on the hot path of
+        # every rebalancing, so helper method calls are avoided here
+        left, right = rotate_root.left, old_new_root_left
+        left_height  = left.height if left is not None else 0
+        right_height = right.height if right is not None else 0
+        rotate_root.height = (left_height if left_height > right_height else right_height) + 1
+
+        right = new_root.right
+        right_height = right.height if right is not None else 0
+        new_root.height = (rotate_root.height if rotate_root.height > right_height else right_height) + 1
 
         return new_root
 
@@ -171,21 +688,36 @@ class AVL:
         
         new_root = rotate_root.left
         old_new_root_right = new_root.right
+        if self._touched is not None:
+            self._touched.append(new_root)
+            self._touched.append(rotate_root)
 
         new_root.right = rotate_root
-        new_root.right.left = old_new_root_right
+        rotate_root.left = old_new_root_right
+
+        left, right = old_new_root_right, rotate_root.right
+        left_height  = left.height if left is not None else 0
+        right_height = right.height if right is not None else 0
+        rotate_root.height = (left_height if left_height > right_height else right_height) + 1
 
-        self._recalc_height(rotate_root)
-        self._recalc_height(new_root)
+        left = new_root.left
+        left_height = left.height if left is not None else 0
+        new_root.height = (left_height if left_height > rotate_root.height else rotate_root.height) + 1
 
         return new_root
 
     def _run_balancing(self, rotate_node: Node) -> Node:
         """Function to do left rotation in `rotate_node`"""
-        bfactor = self._calc_bfactor(rotate_node)
+        if self._touched is not None:
+            self._touched.append(rotate_node)
+
+        left, right = rotate_node.left, rotate_node.right
+        left_height  = left.height if left is not None else 0
+        right_height = right.height if right is not None else 0
+        bfactor = right_height - left_height
         
         # Update height for each node
-        self._recalc_height(rotate_node)
+        rotate_node.height = (left_height if left_height > right_height else right_height) + 1
 
         # AVL tree is balanced, we leave it as it is
         if -2 < bfactor < 2:
@@ -193,33 +725,92 @@ class AVL:
 
         if bfactor >= 2:
             # Left rotation
-            if self._calc_bfactor(rotate_node.right) >= 0:
+            right_left, right_right = right.left, right.right
+            if (right_right.height if right_right is not None else 0) >= \
+               (right_left.height if right_left is not None else 0):
                 return self._run_left_rotation(rotate_node)
             # Right-Left rotation
             else:
-                rotate_node.right = self._run_right_rotation(rotate_node.right)
+                rotate_node.right = self._run_right_rotation(right)
                 return self._run_left_rotation(rotate_node)
         else:
             # Right rotation
-            if self._calc_bfactor(rotate_node.left) <= 0:
+            left_left, left_right = left.left, left.right
+            if (left_right.height if left_right is not None else 0) <= \
+               (left_left.height if left_left is not None else 0):
                 return self._run_right_rotation(rotate_node)
             # Left-Right rotation
             else:
-                rotate_node.left = self._run_left_rotation(rotate_node.left)
+                rotate_node.left = self._run_left_rotation(left)
                 return self._run_right_rotation(rotate_node)
 
     def _run_insert(self, node: Optional[Node], key: int) -> Node:
-        """Function to insert node in AVL tree with root in `node`"""
+        """
+        Function to insert node in AVL tree with root in `node`
+
+        Insertion is iterative: path from root is saved on the way down and
+        heights are fixed on the way up. Rebalancing stops at the first node
+        whose height didn't change or after the first rotation, because
+        both cases leave heights of all upper nodes unchanged.
+        """
+        self._size += 1
+        new_node = self.Node(key)
+
+        # Equal keys go to the right, so new node can become the rightmost
+        # node with equal to max key, but not the leftmost one
+        if self._min_node is None or key < self._min_node.key:
+            self._min_node = new_node
+        if self._max_node is None or key >= self._max_node.key:
+            self._max_node = new_node
+
         if node is None:
-            self._size += 1
-            return self.Node(key)
+            return new_node
 
-        if key < node.key:
-            node.left = self._run_insert(node.left, key)
+        path = []
+        current = node
+        while current is not None:
+            path.append(current)
+            current = current.left if key < current.key else current.right
+
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = new_node
         else:
-            node.right = self._run_insert(node.right, key)
+            parent.right = new_node
+
+        root = node
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            left, right = current.left, current.right
+            left_height  = left.height if left is not None else 0
+            right_height = right.height if right is not None else 0
+
+            if -2 < right_height - left_height < 2:
+                height = (left_height if left_height > right_height else right_height) + 1
+                if height == current.height:
+                    break
+
+                current.height = height
+                continue
+
+            balanced = self._run_balancing(current)
+            if i == 0:
+                root = balanced
+                break
+
+            parent = path[i - 1]
+            if parent.left is current:
+                parent.left = balanced
+            else:
+                parent.right = balanced
+            break
 
-        return self._run_balancing(node)
+        # Heights of path nodes are updated inline, without _run_balancing,
+        # nodes above the stop point are not changed at all
+        if self._touched is not None:
+            self._touched.extend(path[i:])
+
+        return root
 
     def _min(self, node: Optional[Node]) -> Optional[Node]:
         """Function to find min in AVL tree with root in `node`"""
@@ -253,216 +844,454 @@ class AVL:
         elif key > node.key:
             node.right = self._run_remove(node.right, key)
         else:
-            self._size -= 1
-            
             if node.left is None:
+                self._size -= 1
                 return node.right
             elif node.right is None:
+                self._size -= 1
                 return node.left
             else:
+                # Size is decreased by recursive removal of successor
                 tmp_key = self._min(node.right).key
                 node.key = tmp_key
                 node.right = self._run_remove(node.right, tmp_key)
 
         return self._run_balancing(node)
 
-    def _run_remove_min(self, node: Optional[Node]) -> Optional[Node]:
-        """Remove min node in AVL tree with root in `node`"""
-        min_node = self._min(node)
-        # if min_node is not None:
-        #     return self._run_remove(node, min_node.key)
+    def _run_pop_edge(self, leftmost: bool) -> int:
+        """
+        Remove min (or max if `leftmost` is False) node of non-empty tree in
+        one descent, returns its key
 
-        # return node
-        return self._run_remove(min_node, min_node.key)
+        Cached node is replaced with its in-order neighbour: its only child
+        (a leaf) or its parent. Rotations keep in-order sequence, so neighbour
+        stays the same while path is rebalanced bottom-up.
+        """
+        near, far = ("left", "right") if leftmost else ("right", "left")
 
-    def _run_remove_max(self, node: Optional[Node]) -> Optional[Node]:
-        """Remove max node in AVL tree with root in `node`"""
-        max_node = self._max(node)
-        # if max_node is not None:
-        #     return self._run_remove(node, max_node.key)
-        
-        # return node
-        return self._run_remove(max_node, max_node.key)
+        path = []
+        node = self._root
+        while getattr(node, near) is not None:
+            path.append(node)
+            node = getattr(node, near)
+
+        replacement = getattr(node, far)
+        if path:
+            setattr(path[-1], near, replacement)
+        else:
+            self._root = replacement
+
+        neighbour = replacement if replacement is not None else (path[-1] if path else None)
+        if leftmost:
+            self._min_node = neighbour
+        else:
+            self._max_node = neighbour
+        # The only node was both min and max
+        if self._root is None:
+            self._min_node = self._max_node = None
+
+        self._size -= 1
+        self._run_rebalance_path(path)
+
+        return node.key
+
+    def _run_rebalance_path(self, path: List[Node]) -> None:
+        """
+        Rebalance nodes of path from root bottom-up after removal below it
+
+        Stops when subtree height stays the same, upper nodes are not affected then
+        """
+        for i in range(len(path) - 1, -1, -1):
+            current = path[i]
+            old_height = current.height
+
+            balanced = self._run_balancing(current)
+            if balanced is not current:
+                if i == 0:
+                    self._root = balanced
+                elif path[i - 1].left is current:
+                    path[i - 1].left = balanced
+                else:
+                    path[i - 1].right = balanced
+
+            if balanced.height == old_height:
+                break
 
     def _run_search(self, node: Optional[Node], key: int) -> Optional[Node]:
         """Function to search node with `key` in AVL tree which root in `node`"""
-        if node is None:
-            return None
-
-        found_node = None
+        current = node
+        while current is not None:
+            if key < current.key:
+                current = current.left
+            elif key > current.key:
+                current = current.right
+            else:
+                return current
 
-        if key < node.key:
-            found_node = self._run_search(node.left, key)
-        elif key > node.key:
-            found_node = self._run_search(node.right, key)
-        else:
-            return True
+        return None
 
-        return found_node
-    
     def _run_count(self, node: Optional[Node], key: int) -> int:
-        """Count amount of elements with key `key` in tree"""
+        """
+        Count amount of elements with key `key` in tree
+
+        Equal keys can be on both sides of node with `key` after rotations,
+        so both subtrees of such node are searched, other subtrees are
+        skipped. Takes O(log(n) + k) for k equal keys
+        """
         count = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            while current is not None:
+                if key < current.key:
+                    current = current.left
+                elif key > current.key:
+                    current = current.right
+                else:
+                    count += 1
+                    left, right = current.left, current.right
 
-        if node is not None:
-            if node.key == key:
+                    # If child is equal to `key` too, its inner subtree lies
+                    # between two equal keys, so it is counted without comparisons
+                    if left is not None and left.key == key:
+                        count += 1 + self._run_count_size(left.right)
+                        left = left.left
+                    if right is not None and right.key == key:
+                        count += 1 + self._run_count_size(right.left)
+                        right = right.right
+
+                    stack.append(left)
+                    current = right
+
+        return count
+
+    def _run_count_size(self, node: Optional[Node]) -> int:
+        """Count amount of nodes in tree with explicit stack"""
+        count = 0
+        stack = []
+        push, pop = stack.append, stack.pop
+        current = node
+        while True:
+            # Walk down left spine, right subtrees are postponed
+            while current is not None:
                 count += 1
+                if current.right is not None:
+                    push(current.right)
+                current = current.left
+
+            if not stack:
+                return count
+            current = pop()
+
+    def _sorted_keys_array(self) -> 'numpy.ndarray':
+        """Get sorted numpy array of keys, rebuild it if tree was changed"""
+        if self._keys_array is None:
+            np = _import_numpy()
+            self._keys_array = np.frombuffer(self._int64_keys(), dtype=np.int64)
+
+        return self._keys_array
+
+    def _int64_keys(self) -> array:
+        """Get sorted keys as array('q'), raise error if some key isn't int which fits into int64"""
+        # insert() takes any natural number, casting to int64 would truncate floats silently
+        try:
+            return array("q", self._iter_in_order(self._root))
+        except (TypeError, OverflowError) as error:
+            raise ValueError(f"Keys of tree must be ints which fit into int64: {error}") from None
+
+    def _run_build(self, keys: List[int], lo: int, hi: int) -> Optional[Node]:
+        """Build perfectly balanced tree from sorted slice keys[lo:hi]"""
+        if lo >= hi:
+            return None
 
-                """
-                If key is equal to node.left.key, then this keys
-                can't be placed in node.right subtree and node.left.left
-                subtree, so all this values will be in node.left.right subtree
-                """
-                if node.left is not None and node.left.key == key:
-                    count = count + 1 + \
-                            self._run_count(node.left.left, key) + \
-                            self._run_count_size(node.left.right)
-                else:
-                    count = count + self._run_count(node.left, key)
-
-                """
-                Same case as earlier but mirrored
-                """
-                if node.right is not None and node.right.key == key:
-                    count = count + 1 + \
-                            self._run_count(node.right.right, key) + \
-                            self._run_count_size(node.right.left)
-                else:
-                    count = count + self._run_count(node.right, key)
+        middle = (lo + hi) // 2
+        node = self.Node(keys[middle])
+        node.left  = self._run_build(keys, lo, middle)
+        node.right = self._run_build(keys, middle + 1, hi)
 
-            # Go to the right subtree if key > node.key
-            elif node.key < key:
-                count = self._run_count(node.right, key)
-            # Go to the left subtree if key < node.key
-            elif node.key > key:
-                count = self._run_count(node.left, key)
+        left_height  = node.left.height if node.left is not None else 0
+        right_height = node.right.height if node.right is not None else 0
+        node.height = (left_height if left_height > right_height else right_height) + 1
 
-        return count
+        return node
 
-    def _run_count_size(self, node: Node) -> int:
-        """Recursively count amount of nodes in tree"""
-        if node is None:
-            return 0
+    def _run_build_from_iter(self, keys, size: int) -> Optional[Node]:
+        """
+        Build perfectly balanced tree from iterator over `size` sorted keys
 
-        count = 1
-        for child in [node.left, node.right]:
-            count += self._run_count_size(child)
+        Keys are consumed in order, so tree has the same shape as one built
+        by _run_build() without list of all keys
+        """
+        if size <= 0:
+            return None
 
-        return count
+        left = self._run_build_from_iter(keys, size // 2)
+        node = self.Node(next(keys))
+        node.left  = left
+        node.right = self._run_build_from_iter(keys, size - size // 2 - 1)
+
+        left_height  = node.left.height if node.left is not None else 0
+        right_height = node.right.height if node.right is not None else 0
+        node.height = (left_height if left_height > right_height else right_height) + 1
+
+        return node
+
+    @staticmethod
+    def _read_dump_keys(fileobj, size: int, byteorder: str, chunk_size: int):
+        """Lazily read `size` keys written by dump(), check that they are sorted natural numbers"""
+        previous = 0
+        left = size
+        while left > 0:
+            chunk = array("q")
+            # Raises EOFError if file is shorter than header says
+            chunk.fromfile(fileobj, min(chunk_size, left))
+            if byteorder != sys.byteorder:
+                chunk.byteswap()
+
+            for key in chunk:
+                if key < previous:
+                    raise ValueError("Keys of AVL dump must be sorted natural numbers!")
+                previous = key
+                yield key
+
+            left -= len(chunk)
 
     def _run_deepcopy(self, node: Optional[Node]) -> Optional[Node]:
-        """Helper method to copy each node recursively"""
+        """Helper method to copy each node with explicit stack"""
         if node is None:
             return None
 
-        # Copy current node and recursively copy it's subtrees
-        new_node        = self.Node(key=node.key)
-        new_node.height = node.height
-        new_node.left   = self._run_deepcopy(node.left)
-        new_node.right  = self._run_deepcopy(node.right)
-
-        return new_node
-
-    def _run_split(self, node: Optional[Node], key: int) -> ('AVL', 'AVL'):
-        """Helper for split tree at given key"""
-        # Base case
+        Node = self.Node
+        new_root = Node(node.key)
+        # Pairs are (source node, its copy) of postponed right subtrees
+        stack = []
+        push, pop = stack.append, stack.pop
+        current, new_node = node, new_root
+        while True:
+            # Copy left spine, right subtrees are postponed
+            while True:
+                new_node.height = current.height
+                right = current.right
+                if right is not None:
+                    new_node.right = Node(right.key)
+                    push((right, new_node.right))
+
+                current = current.left
+                if current is None:
+                    break
+                new_node.left = Node(current.key)
+                new_node = new_node.left
+
+            if not stack:
+                return new_root
+            current, new_node = pop()
+
+    def _run_split(self, node: Optional[Node], key: int,
+                   equal_to_left: bool) -> (Optional[Node], Optional[Node]):
+        """
+        Split tree with root in `node` into trees with keys less than `key`
+        and keys greater or equal to `key`. If `equal_to_left` is True, keys
+        equal to `key` go to the left tree instead. Takes O(log(n)).
+        """
         if node is None:
             return None, None
 
-        # Target key is in left subtree
-        if key < node.key:
-            left_tree, node.left = self._run_split(node.left, key)
-            node = self._run_balancing(node)
-            return left_tree, node
-        # Target node is in right subtree
-        elif key > node.key:
-            node.right, right_tree = self._run_split(node.right, key)
-            node = self._run_balancing(node)
-            return node, right_tree
-        # Target node was found
+        left, right = node.left, node.right
+        node.left, node.right = None, None
+
+        if node.key < key or (equal_to_left and node.key == key):
+            # Node and its left subtree are in the left part
+            right_left, right_right = self._run_split(right, key, equal_to_left)
+            return self._run_join(left, node, right_left), right_right
         else:
-            left_tree = node.left
-            right_tree = node.right
-            node.left, node.right = None, None
-            return left_tree, right_tree
-            
-
-    def _run_validate_AVL_BST(self, node: Optional[Node]) -> bool:
-        """Validate BST property"""
-        # Empty tree = correct BST 
-        if node is None:
-            return True
-        # Left child has greater value than parent
-        if node.left is not None and node.key < node.left.key:
-            return False
-        # Right child has less value than parent
-        if node.right is not None and node.key > node.right.key:
-            return False
-        if abs(self._calc_bfactor(node)) >= 2:
-            return False
+            # Node and its right subtree are in the right part
+            left_left, left_right = self._run_split(left, key, equal_to_left)
+            return left_left, self._run_join(left_right, node, right)
 
-        # Rescursively check BST structure
-        return self._run_validate_AVL_BST(node.left) and \
-               self._run_validate_AVL_BST(node.right)
-    
-    def _run_clear(self, node: Optional[Node]) -> None:
-        """Clear all tree with root in `node`"""
-        if node is None:
-            return
-        
-        self._run_clear(node.left)
-        self._run_clear(node.right)
+    def _run_join(self, left: Optional[Node], node: Node, right: Optional[Node]) -> Node:
+        """
+        Join two trees with `node` between them: keys of `left` must be
+        not greater than `node.key` and keys of `right` not less than it.
+        Takes O(|height(left) - height(right)|).
+        """
+        left_height  = left.height if left is not None else 0
+        right_height = right.height if right is not None else 0
+
+        if left_height > right_height + 1:
+            # Go down along right spine of higher left tree
+            left.right = self._run_join(left.right, node, right)
+            return self._run_balancing(left)
+        if right_height > left_height + 1:
+            right.left = self._run_join(left, node, right.left)
+            return self._run_balancing(right)
+
+        node.left, node.right = left, right
+        node.height = (left_height if left_height > right_height else right_height) + 1
+        if self._touched is not None:
+            self._touched.append(node)
+
+        return node
+
+    def _run_concat(self, left: Optional[Node], right: Optional[Node]) -> Optional[Node]:
+        """Join two trees, all keys of `left` must be not greater than keys of `right`"""
+        if right is None:
+            return left
+        if left is None:
+            return right
+
+        # Min node of right tree becomes node between two trees
+        min_node = self._min(right)
+        right = self._run_detach_min(right)
+        return self._run_join(left, min_node, right)
+
+    def _run_detach_min(self, node: Node) -> Optional[Node]:
+        """Unlink min node from tree with root in `node`, node itself is kept intact"""
+        if node.left is None:
+            return node.right
+
+        node.left = self._run_detach_min(node.left)
+        return self._run_balancing(node)
 
-        node.left  = None
-        node.right = None
-        node       = None
+    def _iter_validate(self, root: Optional[Node], size: int):
+        """
+        Validate tree with root in `root` in one iterative post-order pass
 
+        Every key is checked against bounds given by all its ancestors, heights
+        are recomputed from leaves instead of trusting stored ones, so balance
+        is checked by real heights, and nodes are counted on the way.
+        Yields True after each valid node, False at first violation, and
+        finally result of comparison of amount of nodes with `size`.
+        """
+        count = 0
+        # Heights of checked subtrees, right subtree height is on top
+        heights = []
+        # Entries are (node, lower bound, upper bound, children are checked)
+        stack = [(root, None, None, False)] if root is not None else []
+        while stack:
+            node, lo, hi, children_checked = stack.pop()
+            left, right, key = node.left, node.right, node.key
+
+            if not children_checked:
+                if (lo is not None and key < lo) or (hi is not None and key > hi):
+                    yield False
+                    return
+
+                stack.append((node, lo, hi, True))
+                if right is not None:
+                    stack.append((right, key, hi, False))
+                if left is not None:
+                    stack.append((left, lo, key, False))
+                continue
+
+            right_height = heights.pop() if right is not None else 0
+            left_height  = heights.pop() if left is not None else 0
+            height = (left_height if left_height > right_height else right_height) + 1
+            if height != node.height or not -2 < right_height - left_height < 2:
+                yield False
+                return
+
+            heights.append(height)
+            count += 1
+            yield True
+
+        yield count == size
+    
     #=================#
     # TREE TRAVERSALS #
     #=================#
+    def _iter_in_order(self, node: Optional[Node], reverse: bool = False):
+        """Lazy in order traversal with explicit stack, descending if `reverse`"""
+        near, far = ("right", "left") if reverse else ("left", "right")
+        stack = []
+        push, pop = stack.append, stack.pop
+        current = node
+        while True:
+            while current is not None:
+                push(current)
+                current = getattr(current, near)
+
+            if not stack:
+                return
+            current = pop()
+            yield current.key
+            current = getattr(current, far)
+
+    # Traversals use explicit stacks instead of recursion: no Python frame
+    # per node and no recursion limit. Spines are walked in inner loops and
+    # only postponed nodes are pushed to stack. Morris traversal would need
+    # no stack at all, but it temporarily relinks nodes, which is unsafe
+    # while async iterators of the same tree are suspended
     def _get_in_order(self, node: Optional[Node], keys: List[int]) -> None:
         """In order tree traversal"""
-        if node is None:
-            return
-
-        self._get_in_order(node.left, keys)
-        keys.append(node.key)
-        self._get_in_order(node.right, keys)
+        append = keys.append
+        stack = []
+        push, pop = stack.append, stack.pop
+        current = node
+        while True:
+            while current is not None:
+                push(current)
+                current = current.left
+
+            if not stack:
+                return
+            current = pop()
+            append(current.key)
+            current = current.right
 
     def _get_pre_order(self, node: Optional[Node], keys: List[int]) -> None:
         """Pre order tree traversal"""
-        if node is None:
-            return
-
-        keys.append(node.key)
-        self._get_pre_order(node.left, keys)
-        self._get_pre_order(node.right, keys)
+        append = keys.append
+        stack = []
+        push, pop = stack.append, stack.pop
+        current = node
+        while True:
+            # Visit left spine, right subtrees are postponed
+            while current is not None:
+                append(current.key)
+                if current.right is not None:
+                    push(current.right)
+                current = current.left
+
+            if not stack:
+                return
+            current = pop()
 
     def _get_post_order(self, node: Optional[Node], keys: List[int]) -> None:
         """Post order tree traversal"""
-        if node is None:
-            return
+        # Mirrored pre order (node, right, left) reversed is exactly post order
+        start = len(keys)
+        append = keys.append
+        stack = []
+        push, pop = stack.append, stack.pop
+        current = node
+        while True:
+            while current is not None:
+                append(current.key)
+                if current.left is not None:
+                    push(current.left)
+                current = current.right
+
+            if not stack:
+                break
+            current = pop()
 
-        self._get_post_order(node.left, keys)
-        self._get_post_order(node.right, keys)
-        keys.append(node.key)
+        keys[start:] = keys[start:][::-1]
 
     def _get_width_traversal(self, root: Optional[Node], keys: List[int]) -> None:
         """Breadth-first tree traversal"""
         if root is None:
             return
 
-        q = queue.Queue()
-        q.put(root)
-
-        while not q.empty():
-            current = q.get()
+        # deque is used instead of thread-safe queue.Queue, which takes a lock on every call
+        q = deque([root])
+        while q:
+            current = q.popleft()
             keys.append(current.key)
 
             if current.left is not None:
-                q.put(current.left)
+                q.append(current.left)
             if current.right is not None:
-                q.put(current.right)
+                q.append(current.right)
 
     #===============#
     # MAGIC METHODS #
@@ -471,11 +1300,13 @@ class AVL:
         """Get amount of elements in tree"""
         return self._size
 
+    def __iter__(self):
+        """Lazily iterate over keys in ascending order"""
+        return self._iter_in_order(self._root)
+
     def __contains__(self, key: int):
         """Find if tree contatins node with key equal to `key`"""
-        found_node = self._run_search(self._root, key)
-
-        return True if found_node is not None else False
+        return self._run_search(self._root, key) is not None
 
     def __bool__(self) -> bool:
         """Check on True/False"""
@@ -493,7 +1324,8 @@ class AVL:
     #     merged_right = self._run_merge(right, right.right)
 
     #     new_node = AVL.Node(right.key, merged_left, merged_right)
-    #     self._recalc_height(new_node)
+    #     new_node.height = 1 + max(self._height(new_node.left),
+    #                               self._height(new_node.right))
         
     #     return self._run_balancing(new_node)
     
@@ -513,9 +1345,10 @@ class AVL:
     
     def __deepcopy__(self, memo={}) -> 'AVL':
         """Deepcopy of tree"""
-        new_tree = AVL()
+        new_tree = AVL(debug=self._touched is not None)
         new_tree._root = self._run_deepcopy(self._root)
         new_tree._size = self._size
+        new_tree._refresh_bounds()
 
         return new_tree
 
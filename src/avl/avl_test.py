@@ -1,6 +1,19 @@
+import asyncio
+import copy
+import io
+import pickle
+import os
+import random
+import subprocess
+import sys
 import unittest
 from avl import AVL
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class TestAVLTree(unittest.TestCase):
 
     def setUp(self):
@@ -26,6 +39,37 @@ class TestAVLTree(unittest.TestCase):
         self.assertTrue(10 in self.avl)
         self.assertTrue(5 in self.avl)
 
+    def test_remove_size(self):
+        """Size is decreased once when removed node has two children"""
+        for key in [10, 5, 20, 15, 25]:
+            self.avl.insert(key)
+
+        self.avl.remove(20)
+        self.assertEqual(len(self.avl), 4)
+        self.assertEqual(self.avl.data(), [5, 10, 15, 25])
+        self.assertTrue(self.avl.validate())
+
+    def test_random_operations(self):
+        """Random inserts and removals keep tree consistent"""
+        rnd = random.Random(2025)
+        expected = []
+
+        for _ in range(2000):
+            key = rnd.randrange(100)
+            if rnd.random() < 0.6:
+                self.avl.insert(key)
+                expected.append(key)
+            else:
+                self.avl.remove(key)
+                if key in expected:
+                    expected.remove(key)
+
+        self.assertEqual(self.avl.data(), sorted(expected))
+        self.assertEqual(len(self.avl), len(expected))
+        self.assertTrue(self.avl.validate())
+        for key in range(100):
+            self.assertEqual(self.avl.count(key), expected.count(key))
+
     def test_height(self):
         """Height calculation test"""
         self.avl.insert(10)
@@ -43,6 +87,57 @@ class TestAVLTree(unittest.TestCase):
         self.assertEqual(self.avl.min(), 5)
         self.assertEqual(self.avl.max(), 20)
 
+    def test_remove_min_max(self):
+        """Removal of min and max keeps the rest of tree"""
+        for key in [10, 20, 5, 15, 30, 1, 7]:
+            self.avl.insert(key)
+
+        self.avl.remove_min()
+        self.avl.remove_max()
+        self.assertEqual(self.avl.data(), [5, 7, 10, 15, 20])
+        self.assertEqual(self.avl.min(), 5)
+        self.assertEqual(self.avl.max(), 20)
+        self.assertEqual(len(self.avl), 5)
+        self.assertTrue(self.avl.validate())
+
+        # Removal from empty tree does nothing
+        self.avl.clear()
+        self.avl.remove_min()
+        self.avl.remove_max()
+        with self.assertRaises(ValueError):
+            self.avl.min()
+        with self.assertRaises(ValueError):
+            self.avl.max()
+
+    def test_priority_queue(self):
+        """Cached min and max follow insertions and removals"""
+        rnd = random.Random(7)
+        expected = []
+
+        for _ in range(1000):
+            action = rnd.random()
+            if action < 0.5 or not expected:
+                key = rnd.randrange(50)
+                self.avl.insert(key)
+                expected.append(key)
+            elif action < 0.7:
+                key = rnd.choice(expected)
+                self.avl.remove(key)
+                expected.remove(key)
+            elif action < 0.85:
+                self.assertEqual(self.avl.pop_min(), min(expected))
+                expected.remove(min(expected))
+            else:
+                self.assertEqual(self.avl.pop_max(), max(expected))
+                expected.remove(max(expected))
+
+            if expected:
+                self.assertEqual(self.avl.min(), min(expected))
+                self.assertEqual(self.avl.max(), max(expected))
+
+        self.assertEqual(self.avl.data(), sorted(expected))
+        self.assertTrue(self.avl.validate())
+
     def test_traversal(self):
         """Tree traversal test"""
         self.avl.insert(10)
@@ -61,6 +156,32 @@ class TestAVLTree(unittest.TestCase):
         self.assertFalse(bool(self.avl))
         self.assertEqual(self.avl.height(), 0)
 
+        # Tree is usable after clear
+        self.avl.insert(5)
+        self.assertEqual(self.avl.data(), [5])
+        self.assertEqual(self.avl.min(), 5)
+
+    def test_deep_tree_walks(self):
+        """Whole tree operations don't recurse, so depth isn't limited by recursion limit"""
+        depth = sys.getrecursionlimit() * 2
+
+        # Chain of nodes with equal keys built by hand, deeper than any AVL tree
+        root = current = AVL.Node(1)
+        for _ in range(depth - 1):
+            current.right = AVL.Node(1)
+            current = current.right
+        self.avl._root = root
+        self.avl._size = depth
+
+        self.assertEqual(self.avl.data(), [1] * depth)
+        self.assertEqual(len(self.avl.data("pre")), depth)
+        self.assertEqual(len(self.avl.data("post")), depth)
+        self.assertEqual(self.avl.count(1), depth)
+        self.assertEqual(self.avl._run_count_size(root), depth)
+        self.assertEqual(len(copy.deepcopy(self.avl).data()), depth)
+        self.assertTrue(1 in self.avl)
+        self.assertFalse(self.avl.validate())
+
     def test_split(self):
         """Split tree test"""
 
@@ -85,6 +206,54 @@ class TestAVLTree(unittest.TestCase):
         self.assertEqual(left.data(), [0, 1, 5, 9, 10])
         self.assertEqual(right.data(), [20, 123, 545])
 
+    def test_split_size(self):
+        """Trees returned by split have correct size and are balanced"""
+        for key in range(100):
+            self.avl.insert(key % 50)
+
+        left, right = self.avl.split(10)
+        self.assertEqual(left.data(), sorted(list(range(10)) * 2))
+        self.assertEqual(right.data(), sorted([10] + list(range(11, 50)) * 2))
+        self.assertEqual(len(left), 20)
+        self.assertEqual(len(right), 79)
+        self.assertTrue(left.validate() and right.validate())
+
+    def test_remove_range(self):
+        """Range removal"""
+        for key in range(100):
+            self.avl.insert(key % 50)
+
+        self.assertEqual(self.avl.remove_range(10, 20), 20)
+        self.assertEqual(self.avl.data(), sorted([key for key in range(50)
+                                                  if not 10 <= key < 20] * 2))
+        self.assertEqual(len(self.avl), 80)
+        self.assertTrue(self.avl.validate())
+
+        self.assertEqual(self.avl.remove_range(30, 30), 0)
+        self.assertEqual(self.avl.remove_range(100, 200), 0)
+        self.assertEqual(self.avl.remove_range(0, 100), 80)
+        self.assertFalse(self.avl)
+
+    def test_pop_min_max(self):
+        """Bulk removal of min and max elements"""
+        for key in [5, 1, 9, 3, 3, 7, 3, 8]:
+            self.avl.insert(key)
+
+        self.assertEqual(self.avl.pop_min(3), [1, 3, 3])
+        self.assertEqual(self.avl.pop_max(2), [9, 8])
+        self.assertEqual(self.avl.data(), [3, 5, 7])
+        self.assertEqual(len(self.avl), 3)
+        self.assertTrue(self.avl.validate())
+
+        self.assertEqual(self.avl.pop_min(), 3)
+        self.assertEqual(self.avl.pop_max(), 7)
+        self.assertEqual(self.avl.pop_min(0), [])
+        self.assertEqual(self.avl.pop_max(10), [5])
+        self.assertEqual(len(self.avl), 0)
+
+        with self.assertRaises(ValueError):
+            self.avl.pop_min()
+
     def test_validation(self):
         """Tree validation"""
         self.avl.insert(10)
@@ -92,6 +261,163 @@ class TestAVLTree(unittest.TestCase):
         self.avl.insert(5)
         self.assertTrue(self.avl.validate())
 
+    def test_validation_errors(self):
+        """Validation finds broken bounds, heights and size"""
+        for key in range(1, 8):
+            self.avl.insert(key)
+        root = self.avl.raw()
+
+        # Key is ordered with its parent, but not with the root
+        root.left.right.key = 5
+        self.assertFalse(self.avl.validate())
+        root.left.right.key = 3
+
+        root.left.height += 1
+        self.assertFalse(self.avl.validate())
+        root.left.height -= 1
+
+        self.avl._size += 1
+        self.assertFalse(self.avl.validate())
+        self.avl._size -= 1
+        self.assertTrue(self.avl.validate())
+
+    def test_debug_mode(self):
+        """Debug mode checks nodes touched by every mutation"""
+        tree = AVL(debug=True)
+        for key in range(100):
+            tree.insert(key)
+        for key in range(0, 100, 3):
+            tree.remove(key)
+        tree.pop_min()
+        tree.pop_max(5)
+        tree.remove_range(40, 60)
+        tree.split(70)
+        self.assertTrue(tree.validate())
+
+        # Breakage on the path of insertion is found at once
+        tree = AVL(debug=True)
+        for key in (2, 1, 3):
+            tree.insert(key)
+        tree.raw().left.key = 5
+        with self.assertRaises(RuntimeError):
+            tree.insert(0)
+
+    def test_debug_mode_is_inherited(self):
+        """Trees derived from debug tree keep debug mode"""
+        tree = AVL(debug=True)
+        for key in range(20):
+            tree.insert(key)
+
+        derived = [*tree.split(10), tree + AVL(), copy.deepcopy(tree),
+                   asyncio.run(tree.amerge(None)),
+                   AVL.from_sorted([1, 2, 3], debug=True)]
+
+        buffer = io.BytesIO()
+        tree.dump(buffer)
+        buffer.seek(0)
+        derived.append(AVL.load(buffer, debug=True))
+
+        for new_tree in derived:
+            self.assertIsNotNone(new_tree._touched)
+            new_tree.insert(100)
+            self.assertTrue(new_tree.validate())
+
+        self.assertIsNone(AVL.from_sorted([1, 2, 3])._touched)
+        self.assertIsNone(copy.deepcopy(AVL())._touched)
+
+    def test_dump_load(self):
+        """Tree is restored from chunked dump as balanced tree"""
+        rnd = random.Random(38)
+        keys = [rnd.randrange(100) for _ in range(1000)]
+        for key in keys:
+            self.avl.insert(key)
+
+        fileobj = io.BytesIO()
+        self.avl.dump(fileobj, chunk_size=64)
+        fileobj.seek(0)
+
+        loaded = AVL.load(fileobj, chunk_size=100)
+        self.assertEqual(loaded.data(), sorted(keys))
+        self.assertEqual(len(loaded), 1000)
+        self.assertEqual((loaded.min(), loaded.max()), (min(keys), max(keys)))
+        self.assertTrue(loaded.validate())
+
+        # Empty tree
+        fileobj = io.BytesIO()
+        AVL().dump(fileobj)
+        fileobj.seek(0)
+        self.assertEqual(AVL.load(fileobj).data(), [])
+
+    def test_dump_keys_out_of_int64(self):
+        """Tree with keys which are not int64 is rejected before anything is written"""
+        self.avl.insert(1)
+        self.avl.insert(2**63)
+
+        fileobj = io.BytesIO()
+        with self.assertRaises(ValueError):
+            self.avl.dump(fileobj)
+        self.assertEqual(fileobj.getvalue(), b"")
+
+        with self.assertRaises(ValueError):
+            self.avl.keys_buffer()
+
+        # Key which isn't int is found by check of all keys, not only of max
+        tree = AVL()
+        for key in (1.5, 2, 3):
+            tree.insert(key)
+        fileobj = io.BytesIO()
+        with self.assertRaises(ValueError):
+            tree.dump(fileobj)
+        self.assertEqual(fileobj.getvalue(), b"")
+        with self.assertRaises(ValueError):
+            tree.keys_buffer()
+
+        self.avl.remove(2**63)
+        self.avl.insert(2**63 - 1)
+        self.assertEqual(self.avl.keys_buffer().tolist(), [1, 2**63 - 1])
+
+    def test_load_errors(self):
+        """Broken dumps are rejected"""
+        for key in range(10):
+            self.avl.insert(key)
+        fileobj = io.BytesIO()
+        self.avl.dump(fileobj)
+        dump = fileobj.getvalue()
+
+        with self.assertRaises(EOFError):
+            AVL.load(io.BytesIO(dump[:-8]))
+
+        # Keys are not sorted
+        header = pickle.dumps({"format": "AVL", "version": 1, "size": 2, "byteorder": "little"})
+        with self.assertRaises(ValueError):
+            AVL.load(io.BytesIO(header + (5).to_bytes(8, "little") + (1).to_bytes(8, "little")))
+
+        with self.assertRaises(ValueError):
+            AVL.load(io.BytesIO(pickle.dumps({"format": "HashTable"})))
+
+    def test_keys_buffer(self):
+        """Keys are exported as read-only int64 buffer"""
+        for key in [5, 1, 3, 3]:
+            self.avl.insert(key)
+
+        buffer = self.avl.keys_buffer()
+        self.assertEqual(buffer.format, "q")
+        self.assertEqual(buffer.itemsize, 8)
+        self.assertTrue(buffer.readonly)
+        self.assertEqual(buffer.tolist(), [1, 3, 3, 5])
+
+    def test_rank(self):
+        """Rank counts smaller keys from the nearer end"""
+        rnd = random.Random(40)
+        keys = [rnd.randrange(50) for _ in range(300)]
+        for key in keys:
+            self.avl.insert(key)
+
+        self.assertEqual(list(self.avl), sorted(keys))
+        for key in range(-1, 52):
+            self.assertEqual(self.avl.rank(key), sum(k < key for k in keys))
+        self.assertEqual(AVL().rank(5), 0)
+
     def test_add(self):
         """Merge two trees"""
         self.avl.insert(2311)
@@ -107,5 +433,158 @@ class TestAVLTree(unittest.TestCase):
         self.assertTrue(new_avl.validate())
         self.assertEqual(new_avl.size(), 6)
 
+    def test_memory_usage(self):
+        """Memory usage grows with amount of nodes"""
+        empty_usage = self.avl.memory_usage()
+
+        for key in range(100):
+            self.avl.insert(key)
+
+        shallow_usage = self.avl.memory_usage(deep=False)
+        deep_usage = self.avl.memory_usage()
+        self.assertGreater(shallow_usage, empty_usage)
+        self.assertGreater(deep_usage, shallow_usage)
+
+        self.avl.clear()
+        self.assertEqual(self.avl.memory_usage(), empty_usage)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_batch_queries(self):
+        """Vectorized contains and count"""
+        for key in [10, 20, 20, 5, 20]:
+            self.avl.insert(key)
+
+        queries = numpy.array([5, 6, 20, 100])
+        self.assertEqual(self.avl.contains_many(queries).tolist(),
+                         [True, False, True, False])
+        self.assertEqual(self.avl.count_many(queries).tolist(), [1, 0, 3, 0])
+
+        # Cached array of keys is rebuilt after modification
+        self.avl.insert(6)
+        self.avl.remove(20)
+        self.assertEqual(self.avl.contains_many(queries).tolist(),
+                         [True, True, True, False])
+        self.assertEqual(self.avl.count_many(queries).tolist(), [1, 1, 2, 0])
+
+        self.avl.clear()
+        self.assertEqual(self.avl.contains_many(queries).tolist(), [False] * 4)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_insert_many(self):
+        """Batch insertion keeps tree balanced"""
+        rnd = numpy.random.default_rng(2025)
+        expected = []
+
+        for batch_size in [1000, 3, 1, 500, 5000]:
+            keys = rnd.integers(0, 1000, size=batch_size)
+            self.avl.insert_many(keys)
+            expected.extend(keys.tolist())
+
+            self.assertEqual(self.avl.data(), sorted(expected))
+            self.assertEqual(len(self.avl), len(expected))
+            self.assertTrue(self.avl.validate())
+
+        self.assertEqual(self.avl.count(7), expected.count(7))
+
+        with self.assertRaises(ValueError):
+            self.avl.insert_many(numpy.array([1, -1]))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_insert_many_rejects_non_integer_dtype(self):
+        """Float batch is rejected instead of being truncated"""
+        self.avl.insert(5)
+
+        for keys in [numpy.array([1.9, 2.5]), [1.9, 2.5], numpy.array(["1", "2"])]:
+            with self.assertRaises(ValueError):
+                self.avl.insert_many(keys)
+
+        self.assertEqual(self.avl.data(), [5])
+
+        self.avl.insert_many(numpy.array([3, 1], dtype=numpy.uint8))
+        self.assertEqual(self.avl.data(), [1, 3, 5])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_batch_operations_keep_existing_keys(self):
+        """Keys already in tree are not truncated to int64 by batch operations"""
+        for key in (1.5, 2.7):
+            self.avl.insert(key)
+
+        with self.assertRaises(ValueError):
+            self.avl.insert_many(numpy.arange(100))
+        self.assertEqual(self.avl.data(), [1.5, 2.7])
+        with self.assertRaises(ValueError):
+            self.avl.contains_many([1, 2])
+        with self.assertRaises(ValueError):
+            self.avl.count_many([1, 2])
+
+        big = AVL()
+        big.insert(2**63)
+        with self.assertRaises(ValueError):
+            big.insert_many(numpy.arange(10))
+        self.assertEqual(big.data(), [2**63])
+
+    def test_import_side_effects(self):
+        """Importing avl neither imports asyncio nor changes sys.path"""
+        # Test runner has already imported asyncio, so check in a fresh interpreter
+        code = "import sys; path = list(sys.path); import avl; print('asyncio' in sys.modules, sys.path == path)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.split(), ["False", "True"])
+
+    def test_async_operations(self):
+        """Async variants give the same results as sync ones"""
+        for key in range(300):
+            self.avl.insert((key * 37) % 101)
+
+        other = AVL()
+        for key in [5, 1000, 42]:
+            other.insert(key)
+
+        async def run():
+            data = await self.avl.adata(steps=7)
+            valid = await self.avl.avalidate(steps=7, seconds=0.01)
+            merged = await self.avl.amerge(other, steps=7)
+            return data, valid, merged
+
+        data, valid, merged = asyncio.run(run())
+        self.assertEqual(data, self.avl.data())
+        self.assertTrue(valid)
+        self.assertEqual(merged.data(), (self.avl + other).data())
+        self.assertTrue(merged.validate())
+        self.assertEqual(len(self.avl), 300)
+
+    def test_async_yields_to_loop(self):
+        """Other tasks run between chunks"""
+        for key in range(100):
+            self.avl.insert(key)
+
+        async def run():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(len(ticks))
+                    await asyncio.sleep(0)
+
+            task = asyncio.create_task(ticker())
+            await asyncio.sleep(0)
+            await self.avl.adata(steps=10)
+            task.cancel()
+            return ticks
+
+        self.assertGreaterEqual(len(asyncio.run(run())), 10)
+
+    def test_async_modification(self):
+        """Modification of tree during async iteration is an error"""
+        for key in range(10):
+            self.avl.insert(key)
+
+        async def run():
+            async for key in self.avl.aiter():
+                self.avl.insert(key)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run())
+
 if __name__ == '__main__':
     unittest.main()
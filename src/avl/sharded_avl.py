@@ -0,0 +1,271 @@
+"""
+Ordered multiset of natural numbers range-partitioned across AVL shards.
+
+Shard `i` holds keys `k` such that boundaries[i - 1] <= k < boundaries[i],
+so point queries are routed to one shard, and shards are built, merged
+and split independently. Sorting and merging of shard keys is done
+in a process pool.
+"""
+import bisect
+import heapq
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from avl import AVL
+
+# Amount of sampled keys per shard used to choose boundaries
+SAMPLES_PER_SHARD = 256
+
+
+#===============#
+# SHARD WORKERS #
+#===============#
+# Workers are module level functions so they can be pickled by process pool.
+# Workers do the heavy O(n log n) part and return sorted lists of keys:
+# lists of ints are pickled much faster than node graphs, and unpickling
+# of trees would be done serially in parent process anyway. Shards are
+# then built from sorted keys in O(n).
+def _sort_shard(keys: List[int]) -> List[int]:
+    """Sort keys of shard"""
+    keys.sort()
+    return keys
+
+def _merge_shard(keys: List[int], other_keys: List[int]) -> List[int]:
+    """Merge sorted keys of two shards"""
+    return list(heapq.merge(keys, other_keys))
+
+def _split_shard(keys: List[int], key: int) -> Tuple[List[int], List[int]]:
+    """Split sorted keys of shard by `key` with the same semantic as AVL.split()"""
+    left_end = bisect.bisect_left(keys, key)
+    right_start = left_end
+    # Only one instance of `key` is dropped, like AVL.split() does
+    if right_start < len(keys) and keys[right_start] == key:
+        right_start += 1
+
+    return keys[:left_end], keys[right_start:]
+
+
+class ShardedAVL:
+    """Facade over AVL shards which partition keys by ranges"""
+    def __init__(self, boundaries: Sequence[int] = (), shards: Optional[List[AVL]] = None):
+        if any(left >= right for left, right in zip(boundaries, boundaries[1:])):
+            raise ValueError("Shard boundaries must be strictly increasing!")
+
+        self._boundaries = list(boundaries)
+        if shards is None:
+            shards = [AVL() for _ in range(len(self._boundaries) + 1)]
+        elif len(shards) != len(self._boundaries) + 1:
+            raise ValueError("Amount of shards must be one greater than amount of boundaries!")
+
+        self._shards = shards
+
+    #=========================#
+    # CLASS INTERFACE METHODS #
+    #=========================#
+    @classmethod
+    def build(cls, keys: Iterable[int], shards: Optional[int] = None,
+              max_workers: Optional[int] = None, executor: Optional[Executor] = None,
+              seed: int = 0) -> 'ShardedAVL':
+        """
+        Build sharded tree from keys
+
+        Boundaries are chosen from sample of keys, so shards are of similar
+        size. Shards are built in `executor` or in new process pool with
+        `max_workers` processes; with `max_workers=1` everything is done
+        in current process.
+        """
+        keys = list(keys)
+        if any(key < 0 for key in keys):
+            raise ValueError("Element of tree must be natural number!")
+
+        shards = shards or os.cpu_count() or 1
+        boundaries = cls._choose_boundaries(keys, shards, random.Random(seed))
+
+        parts = [[] for _ in range(len(boundaries) + 1)]
+        for key in keys:
+            parts[bisect.bisect_right(boundaries, key)].append(key)
+
+        sorted_parts = _map(_sort_shard, [(part,) for part in parts], executor, max_workers)
+
+        return cls(boundaries, [AVL.from_sorted(part) for part in sorted_parts])
+
+    def insert(self, key: int) -> None:
+        """Insert new element in tree"""
+        self._shard(key).insert(key)
+
+    def remove(self, key: int) -> None:
+        """Remove specified element from tree"""
+        self._shard(key).remove(key)
+
+    def min(self) -> int:
+        """Get min element in tree"""
+        for shard in self._shards:
+            if shard:
+                return shard.min()
+
+        raise ValueError("AVL tree is empty!")
+
+    def max(self) -> int:
+        """Get max element in tree"""
+        for shard in reversed(self._shards):
+            if shard:
+                return shard.max()
+
+        raise ValueError("AVL tree is empty!")
+
+    def count(self, key: int) -> int:
+        """Count amount elements with key `key` in tree"""
+        return self._shard(key).count(key)
+
+    def range(self, lo: int, hi: int) -> List[int]:
+        """Get sorted keys `k` such that lo <= k < hi"""
+        if lo >= hi:
+            return []
+
+        keys = []
+        first = bisect.bisect_right(self._boundaries, lo)
+        last  = bisect.bisect_right(self._boundaries, hi - 1)
+        for shard in self._shards[first:last + 1]:
+            keys.extend(shard.range(lo, hi))
+
+        return keys
+
+    def data(self) -> List[int]:
+        """Get sorted elements of tree"""
+        keys = []
+        for shard in self._shards:
+            keys.extend(shard.data())
+
+        return keys
+
+    def shards(self) -> List[AVL]:
+        """Get shards of tree"""
+        return list(self._shards)
+
+    def boundaries(self) -> List[int]:
+        """Get boundaries between shards"""
+        return list(self._boundaries)
+
+    def size(self) -> int:
+        """Return size of tree"""
+        return sum(len(shard) for shard in self._shards)
+
+    def union(self, other: 'ShardedAVL', max_workers: Optional[int] = None,
+              executor: Optional[Executor] = None) -> 'ShardedAVL':
+        """
+        Merge two trees into new one with boundaries of `self`
+
+        Keys of each pair of shards are merged in separate worker and
+        every shard is built in O(n + m) instead of m insertions.
+        Keys of `other` are repartitioned if it has different boundaries.
+        """
+        if other._boundaries == self._boundaries:
+            other_parts = [shard.data() for shard in other._shards]
+        else:
+            other_parts = [[] for _ in self._shards]
+            for key in other.data():
+                other_parts[bisect.bisect_right(self._boundaries, key)].append(key)
+
+        tasks = [(shard.data(), other_part)
+                 for shard, other_part in zip(self._shards, other_parts)]
+
+        merged_parts = _map(_merge_shard, tasks, executor, max_workers)
+
+        return ShardedAVL(self._boundaries, [AVL.from_sorted(part) for part in merged_parts])
+
+    def split(self, key: int) -> Tuple['ShardedAVL', 'ShardedAVL']:
+        """
+        Splits tree at given key, like AVL.split() source tree isn't changed
+
+        Only shard of `key` is split, other shards are copied to the
+        corresponding side. Every shard is rebuilt from its sorted keys
+        in O(n), no process pool is needed for this linear work.
+        """
+        index = bisect.bisect_right(self._boundaries, key)
+        left_keys, right_keys = _split_shard(self._shards[index].data(), key)
+
+        left_shards = [AVL.from_sorted(shard.data()) for shard in self._shards[:index]]
+        right_shards = [AVL.from_sorted(shard.data()) for shard in self._shards[index + 1:]]
+
+        left = ShardedAVL(self._boundaries[:index],
+                          left_shards + [AVL.from_sorted(left_keys)])
+        right = ShardedAVL(self._boundaries[index:],
+                           [AVL.from_sorted(right_keys)] + right_shards)
+
+        return left, right
+
+    def validate(self) -> bool:
+        """Validate every shard and check that keys are in their shard ranges"""
+        for i, shard in enumerate(self._shards):
+            if not shard.validate():
+                return False
+            if not shard:
+                continue
+            if i > 0 and shard.min() < self._boundaries[i - 1]:
+                return False
+            if i < len(self._boundaries) and shard.max() >= self._boundaries[i]:
+                return False
+
+        return True
+
+    #=======================#
+    # CLASS BACKEND METHODS #
+    #=======================#
+    def _shard(self, key: int) -> AVL:
+        """Get shard which holds `key`"""
+        return self._shards[bisect.bisect_right(self._boundaries, key)]
+
+    @staticmethod
+    def _choose_boundaries(keys: List[int], shards: int, rnd: random.Random) -> List[int]:
+        """Choose up to `shards - 1` boundaries by quantiles of sample of keys"""
+        if shards <= 1 or not keys:
+            return []
+
+        sample = sorted(rnd.sample(keys, min(len(keys), shards * SAMPLES_PER_SHARD)))
+
+        boundaries = []
+        for i in range(1, shards):
+            boundary = sample[i * len(sample) // shards]
+            # Skewed keys give equal quantiles, such shards are joined
+            if (not boundaries or boundary > boundaries[-1]) and boundary > sample[0]:
+                boundaries.append(boundary)
+
+        return boundaries
+
+    #===============#
+    # MAGIC METHODS #
+    #===============#
+    def __len__(self):
+        """Get amount of elements in tree"""
+        return self.size()
+
+    def __contains__(self, key: int):
+        """Find if tree contains node with key equal to `key`"""
+        return key in self._shard(key)
+
+    def __bool__(self) -> bool:
+        """Check on True/False"""
+        return any(self._shards)
+
+    def __add__(self, other: Optional['ShardedAVL']) -> 'ShardedAVL':
+        """+ operator, merges shards in current process, see union() for process pool"""
+        if other is None:
+            other = ShardedAVL(self._boundaries)
+
+        # Operator shouldn't start processes, pool costs more than merge of small trees
+        return self.union(other, max_workers=1)
+
+
+def _map(func: Callable, tasks: List[tuple], executor: Optional[Executor],
+         max_workers: Optional[int]) -> list:
+    """Run `func` for each tuple of arguments in executor, keep order of results"""
+    if executor is None and max_workers == 1:
+        return [func(*args) for args in tasks]
+
+    if executor is not None:
+        return list(executor.map(func, *zip(*tasks))) if tasks else []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(func, *zip(*tasks))) if tasks else []
@@ -0,0 +1,108 @@
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+from sharded_avl import ShardedAVL
+
+class TestShardedAVL(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(2025)
+        self.keys = [rnd.randrange(10000) for _ in range(2000)]
+        self.tree = ShardedAVL.build(self.keys, shards=4, max_workers=1)
+
+    def test_build(self):
+        """Keys are partitioned between valid shards"""
+        self.assertEqual(len(self.tree.shards()), 4)
+        self.assertEqual(len(self.tree.boundaries()), 3)
+        self.assertEqual(self.tree.data(), sorted(self.keys))
+        self.assertEqual(len(self.tree), 2000)
+        self.assertTrue(self.tree.validate())
+
+    def test_build_in_process_pool(self):
+        """Shards built by worker processes are the same"""
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            tree = ShardedAVL.build(self.keys, shards=4, executor=executor)
+
+        self.assertEqual(tree.boundaries(), self.tree.boundaries())
+        self.assertEqual(tree.data(), sorted(self.keys))
+
+    def test_skewed_keys(self):
+        """Equal quantiles don't produce empty ranges"""
+        tree = ShardedAVL.build([7] * 100 + [1, 2, 3], shards=8, max_workers=1)
+
+        self.assertTrue(tree.validate())
+        self.assertEqual(tree.count(7), 100)
+        self.assertEqual(tree.min(), 1)
+
+        with self.assertRaises(ValueError):
+            ShardedAVL.build([1, -1], max_workers=1)
+
+    def test_queries(self):
+        """Queries are routed to shards"""
+        sorted_keys = sorted(self.keys)
+
+        self.assertEqual(self.tree.min(), sorted_keys[0])
+        self.assertEqual(self.tree.max(), sorted_keys[-1])
+        for key in range(0, 10000, 97):
+            self.assertEqual(self.tree.count(key), self.keys.count(key))
+            self.assertEqual(key in self.tree, key in self.keys)
+
+        for lo, hi in [(0, 10000), (100, 5000), (2500, 2600), (5000, 100)]:
+            self.assertEqual(self.tree.range(lo, hi),
+                             [key for key in sorted_keys if lo <= key < hi])
+
+        with self.assertRaises(ValueError):
+            ShardedAVL().min()
+
+    def test_insert_remove(self):
+        """Point modifications keep keys in their shards"""
+        self.tree.insert(0)
+        self.tree.insert(20000)
+        self.tree.remove(self.keys[0])
+
+        expected = sorted(self.keys[1:] + [0, 20000])
+        self.assertEqual(self.tree.data(), expected)
+        self.assertEqual(self.tree.max(), 20000)
+        self.assertTrue(self.tree.validate())
+
+    def test_add_in_process(self):
+        """+ merges shards without process pool"""
+        other = ShardedAVL.build([1, 5000, 9999], shards=2, max_workers=1)
+        with mock.patch("sharded_avl.ProcessPoolExecutor", side_effect=AssertionError):
+            union = self.tree + other
+            self.assertEqual((self.tree + None).data(), sorted(self.keys))
+
+        self.assertEqual(union.data(), sorted(self.keys + [1, 5000, 9999]))
+        self.assertTrue(union.validate())
+
+    def test_union(self):
+        """Union with same and different boundaries"""
+        other = ShardedAVL.build(self.keys[:500], shards=4, max_workers=1)
+        union = self.tree.union(other, max_workers=1)
+        self.assertEqual(union.data(), sorted(self.keys + self.keys[:500]))
+        self.assertEqual(union.boundaries(), self.tree.boundaries())
+        self.assertTrue(union.validate())
+
+        other = ShardedAVL.build([1, 5000, 9999], shards=2, max_workers=1)
+        union = self.tree.union(other, max_workers=1)
+        self.assertEqual(union.data(), sorted(self.keys + [1, 5000, 9999]))
+        self.assertTrue(union.validate())
+
+        # Source trees are not changed
+        self.assertEqual(self.tree.data(), sorted(self.keys))
+
+    def test_split(self):
+        """Split drops one instance of key, source tree is not changed"""
+        key = self.keys[0]
+        left, right = self.tree.split(key)
+
+        sorted_keys = sorted(self.keys)
+        index = sorted_keys.index(key)
+        self.assertEqual(left.data(), sorted_keys[:index])
+        self.assertEqual(right.data(), sorted_keys[index + 1:])
+        self.assertTrue(left.validate() and right.validate())
+        self.assertEqual(len(self.tree), 2000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Layout engine for AVL tree visualization.
+
+Coordinates of all nodes are calculated in one iterative O(n) pass:
+x is the in-order index of node and y is minus depth of node, so nodes
+never overlap regardless of tree size. Module doesn't depend on matplotlib
+and also exports layouts to SVG and Graphviz DOT.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import avl
+
+
+class Layout(NamedTuple):
+    """Coordinates of tree nodes, i-th element of each list is i-th node"""
+    keys:      List[int]
+    x:         List[float]
+    y:         List[float]
+    # Pairs of (parent index, child index)
+    edges:     List[Tuple[int, int]]
+    # True for nodes, whose children were cut by depth limit
+    truncated: List[bool]
+
+    def segments(self) -> List[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """Get edges as line segments, ready for `LineCollection`"""
+        x, y = self.x, self.y
+        return [((x[parent], y[parent]), (x[child], y[child]))
+                for parent, child in self.edges]
+
+
+def find_node(root: Optional[avl.AVL.Node], key: int) -> Optional[avl.AVL.Node]:
+    """Find node with `key` in tree with root in `root` to focus on its subtree"""
+    current = root
+    while current is not None and current.key != key:
+        current = current.left if key < current.key else current.right
+
+    return current
+
+
+def compute_layout(root: Optional[avl.AVL.Node], max_depth: Optional[int] = None) -> Layout:
+    """
+    Calculate coordinates of nodes for tree with root in `root`.
+
+    If `max_depth` is set, only nodes with depth less than `max_depth`
+    are placed (root has depth 0).
+    """
+    if max_depth is not None and max_depth < 1:
+        raise ValueError("Depth limit must be positive!")
+
+    keys, xs, ys, truncated = [], [], [], []
+    edges = []
+
+    # Index of node in layout by id of node, parents are placed after their
+    # left children, so edges are resolved when whole traversal is done
+    index_of = {}
+    pending_edges = []
+
+    stack = []
+    current, depth, parent = root, 0, None
+
+    while stack or current is not None:
+        # Go to the leftmost visible node
+        while current is not None:
+            stack.append((current, depth, parent))
+            if max_depth is not None and depth + 1 >= max_depth:
+                break
+            current, depth, parent = current.left, depth + 1, current
+
+        node, depth, parent = stack.pop()
+        index = len(keys)
+        index_of[id(node)] = index
+
+        keys.append(node.key)
+        xs.append(float(index))
+        ys.append(float(-depth))
+
+        is_cut = max_depth is not None and depth + 1 >= max_depth
+        truncated.append(is_cut and (node.left is not None or node.right is not None))
+
+        if parent is not None:
+            pending_edges.append((id(parent), index))
+
+        if is_cut:
+            current = None
+        else:
+            current, depth, parent = node.right, depth + 1, node
+
+    for parent_id, child_index in pending_edges:
+        edges.append((index_of[parent_id], child_index))
+
+    return Layout(keys, xs, ys, edges, truncated)
+
+
+#===========#
+# EXPORTERS #
+#===========#
+def to_svg(layout: Layout, x_step: float = 30, y_step: float = 50,
+           radius: float = 12, labels: bool = True) -> str:
+    """Render layout to SVG document"""
+    margin = 2 * radius
+    width  = (max(layout.x, default=0) * x_step) + 2 * margin
+    height = (-min(layout.y, default=0) * y_step) + 2 * margin
+
+    def point(i):
+        return layout.x[i] * x_step + margin, -layout.y[i] * y_step + margin
+
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}" height="{height:g}" '
+        f'font-family="sans-serif" font-size="{radius:g}" text-anchor="middle">',
+        '<g stroke="black">',
+    ]
+    for parent, child in layout.edges:
+        (x1, y1), (x2, y2) = point(parent), point(child)
+        lines.append(f'<line x1="{x1:g}" y1="{y1:g}" x2="{x2:g}" y2="{y2:g}"/>')
+    lines.append('</g>')
+
+    lines.append('<g stroke="black" fill="skyblue">')
+    for i in range(len(layout.keys)):
+        x, y = point(i)
+        dash = ' stroke-dasharray="3,2"' if layout.truncated[i] else ''
+        lines.append(f'<circle cx="{x:g}" cy="{y:g}" r="{radius:g}"{dash}/>')
+    lines.append('</g>')
+
+    if labels:
+        lines.append('<g dominant-baseline="central">')
+        for i, key in enumerate(layout.keys):
+            x, y = point(i)
+            lines.append(f'<text x="{x:g}" y="{y:g}">{escape(str(key))}</text>')
+        lines.append('</g>')
+
+    lines.append('</svg>')
+    return "\n".join(lines)
+
+
+def to_dot(layout: Layout, name: str = "AVL") -> str:
+    """Render layout to Graphviz DOT graph, positions are left to Graphviz"""
+    lines = [f'digraph {name} {{', '    node [shape=circle];']
+
+    for i, key in enumerate(layout.keys):
+        lines.append(f'    n{i} [label="{key}"];')
+        # Show that subtree was cut by depth limit
+        if layout.truncated[i]:
+            lines.append(f'    n{i}_more [label="...", shape=plaintext];')
+            lines.append(f'    n{i} -> n{i}_more [style=dashed];')
+
+    for parent, child in layout.edges:
+        lines.append(f'    n{parent} -> n{child};')
+
+    lines.append('}')
+    return "\n".join(lines)
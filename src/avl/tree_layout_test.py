@@ -0,0 +1,77 @@
+import unittest
+from avl import AVL
+import tree_layout
+
+class TestTreeLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.avl = AVL()
+        for key in [10, 5, 20, 1, 7, 15, 30]:
+            self.avl.insert(key)
+
+    def test_layout(self):
+        """Nodes are placed by in-order index and depth"""
+        layout = tree_layout.compute_layout(self.avl.raw())
+
+        self.assertEqual(layout.keys, [1, 5, 7, 10, 15, 20, 30])
+        self.assertEqual(layout.x, [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(layout.y, [-2, -1, -2, 0, -2, -1, -2])
+        self.assertEqual(sorted(layout.edges),
+                         [(1, 0), (1, 2), (3, 1), (3, 5), (5, 4), (5, 6)])
+        self.assertFalse(any(layout.truncated))
+        self.assertEqual(layout.segments()[0][0], (layout.x[1], layout.y[1]))
+
+    def test_depth_limit(self):
+        """Nodes deeper than limit are not placed"""
+        layout = tree_layout.compute_layout(self.avl.raw(), max_depth=2)
+
+        self.assertEqual(layout.keys, [5, 10, 20])
+        self.assertEqual(layout.truncated, [True, False, True])
+        self.assertEqual(len(layout.edges), 2)
+
+        with self.assertRaises(ValueError):
+            tree_layout.compute_layout(self.avl.raw(), max_depth=0)
+
+    def test_subtree(self):
+        """Layout of subtree starts in its root"""
+        node = tree_layout.find_node(self.avl.raw(), 20)
+        layout = tree_layout.compute_layout(node)
+
+        self.assertEqual(layout.keys, [15, 20, 30])
+        self.assertEqual(layout.y, [-1, 0, -1])
+        self.assertIsNone(tree_layout.find_node(self.avl.raw(), 100))
+
+    def test_empty(self):
+        """Empty tree has empty layout"""
+        layout = tree_layout.compute_layout(None)
+
+        self.assertEqual(layout.keys, [])
+        self.assertIn("<svg", tree_layout.to_svg(layout))
+
+    def test_large_tree(self):
+        """Layout of big tree has no overlapping nodes"""
+        tree = AVL()
+        for key in range(5000):
+            tree.insert(key)
+
+        layout = tree_layout.compute_layout(tree.raw())
+        self.assertEqual(len(layout.keys), 5000)
+        self.assertEqual(len(set(zip(layout.x, layout.y))), 5000)
+        self.assertEqual(len(layout.edges), 4999)
+
+    def test_export(self):
+        """SVG and DOT contain all nodes and edges"""
+        layout = tree_layout.compute_layout(self.avl.raw(), max_depth=2)
+
+        svg = tree_layout.to_svg(layout)
+        self.assertEqual(svg.count("<circle"), 3)
+        self.assertEqual(svg.count("<line"), 2)
+        self.assertIn(">10</text>", svg)
+
+        dot = tree_layout.to_dot(layout)
+        self.assertTrue(dot.startswith("digraph AVL {"))
+        self.assertEqual(dot.count("->"), 4)
+        self.assertIn('n1 [label="10"];', dot)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,43 +1,223 @@
-import avl
-import matplotlib.pyplot as plt
-import copy
-
-
-def plot_tree(avl: avl.AVL) -> None:
-    """Visualize whole tree"""
-    fig, ax = plt.subplots(figsize=(12, 8))
-    ax.axis('off')
-
-    plot_node(avl.raw(), 0, 0, 0, ax)
-    plt.show()
-
-
-def plot_node(node, x, y, offset, ax, level=1):
-    """Helper function to visualize tree node by node"""
-    if node is not None:
-        horizontal_offset = 1.5 / level
-        level += 1
-
-        # Plot lines for child nodes
-        if node.left is not None:
-            ax.plot([x, x - horizontal_offset], [y, y - 1], color="black")
-            plot_node(node.left, x - horizontal_offset, y - 1, horizontal_offset / 2, ax, level)
-        if node.right is not None:
-            ax.plot([x, x + horizontal_offset], [y, y - 1], color="black")
-            plot_node(node.right, x + horizontal_offset, y - 1, horizontal_offset / 2, ax, level)
-
-        # Draw label for each node
-        ax.text(x, y, str(node.key), ha="center", va="center",
-                bbox=dict(facecolor="skyblue", edgecolor="black", boxstyle="circle"))
-
-if __name__ == "__main__":
-    # Example of tree visualization
-    avl = avl.AVL()
-
-    print("Введите натуральные числа (элементы дерева) через пробел:")
-    keys = list(map(int, input().split()))
-
-    for key in keys:
-        avl.insert(key)
-
-    plot_tree(avl)
+"""
+AVL tree visualization.
+
+matplotlib is an optional dependency: it is imported only when tree is
+plotted, text renderer, JSON dump and SVG/DOT exports work without it.
+"""
+import argparse
+import json
+import sys
+import avl
+import tree_layout
+from typing import Optional, TextIO
+
+# Drawing text is the slowest part of matplotlib rendering,
+# so keys are drawn only for reasonably small trees
+LABELS_LIMIT = 256
+
+# Branches of text renderer: (right child, left child, vertical line)
+ASCII_BRANCHES   = ("/-- ", "\\-- ", "|   ")
+UNICODE_BRANCHES = ("┌── ", "└── ", "│   ")
+
+
+def plot_tree(avl: avl.AVL, max_depth: Optional[int] = None,
+              subtree: Optional[int] = None, labels: Optional[bool] = None,
+              path: Optional[str] = None) -> None:
+    """
+    Visualize whole tree
+
+    `max_depth` limits depth of drawn nodes, `subtree` draws only subtree
+    with root in node with given key. Keys are drawn if `labels` is True,
+    by default only when amount of drawn nodes is not greater than LABELS_LIMIT.
+    If `path` is set, image is saved to file instead of being shown,
+    which works on headless servers.
+    """
+    plt = _import_pyplot()
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.axis('off')
+
+    plot_layout(_layout(avl, max_depth, subtree), ax, labels)
+
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+        plt.close(fig)
+
+
+def plot_layout(layout: tree_layout.Layout, ax, labels: Optional[bool] = None) -> None:
+    """Draw precalculated layout with a constant amount of matplotlib calls"""
+    from matplotlib.collections import LineCollection
+
+    if labels is None:
+        labels = len(layout.keys) <= LABELS_LIMIT
+
+    ax.add_collection(LineCollection(layout.segments(), colors="black",
+                                     linewidths=0.5, zorder=1))
+
+    # Nodes with cut subtrees are highlighted
+    colors = ["orange" if cut else "skyblue" for cut in layout.truncated]
+    ax.scatter(layout.x, layout.y, s=300 if labels else 10, c=colors,
+               edgecolors="black" if labels else "none", zorder=2)
+
+    if labels:
+        for x, y, key in zip(layout.x, layout.y, layout.keys):
+            ax.text(x, y, str(key), ha="center", va="center", zorder=3)
+
+    ax.autoscale_view()
+
+
+def render_text(avl: avl.AVL, max_depth: Optional[int] = None,
+                subtree: Optional[int] = None, unicode: bool = False) -> str:
+    """
+    Render tree as text, tree is rotated by 90 degrees counterclockwise:
+    root is in the leftmost column and right subtree is above it
+
+            /-- 20
+            |   \\-- 15
+        10
+            \\-- 5
+    """
+    root = _root(avl, subtree)
+    if max_depth is not None and max_depth < 1:
+        raise ValueError("Depth limit must be positive!")
+
+    right_branch, left_branch, vertical = UNICODE_BRANCHES if unicode else ASCII_BRANCHES
+    gap = " " * len(vertical)
+    lines = []
+
+    # Reverse in-order traversal with explicit stack. Items are either nodes
+    # to expand (node, depth, prefix, branch) or lines ready to be emitted
+    stack = [(root, 0, "", "")] if root is not None else []
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            lines.append(item)
+            continue
+
+        node, depth, prefix, branch = item
+        is_cut = max_depth is not None and depth + 1 >= max_depth
+        has_children = node.left is not None or node.right is not None
+        mark = " ..." if is_cut and has_children else ""
+
+        # Vertical line is continued to the sibling placed on the other side
+        right_prefix = prefix + (gap if branch in ("", right_branch) else vertical)
+        left_prefix  = prefix + (gap if branch in ("", left_branch) else vertical)
+
+        if not is_cut and node.left is not None:
+            stack.append((node.left, depth + 1, left_prefix, left_branch))
+        stack.append(f"{prefix}{branch}{node.key}{mark}")
+        if not is_cut and node.right is not None:
+            stack.append((node.right, depth + 1, right_prefix, right_branch))
+
+    return "\n".join(lines)
+
+
+def dump_json(avl: avl.AVL, fileobj: Optional[TextIO] = None,
+              max_depth: Optional[int] = None, subtree: Optional[int] = None) -> Optional[str]:
+    """
+    Dump tree to JSON as nested objects {"key", "height", "left", "right"}
+
+    Nodes whose children were cut by `max_depth` have "truncated": true.
+    JSON is written to `fileobj` if it's set and returned otherwise.
+    """
+    root = _root(avl, subtree)
+    if max_depth is not None and max_depth < 1:
+        raise ValueError("Depth limit must be positive!")
+
+    # Objects are created top-down and attached to already created parents,
+    # so no recursion over the tree is needed
+    result = {"root": None}
+    stack = [(root, 0, result, "root")] if root is not None else []
+    while stack:
+        node, depth, parent, side = stack.pop()
+        obj = {"key": node.key, "height": node.height, "left": None, "right": None}
+        parent[side] = obj
+
+        if max_depth is not None and depth + 1 >= max_depth:
+            if node.left is not None or node.right is not None:
+                obj["truncated"] = True
+            continue
+
+        for child, child_side in ((node.left, "left"), (node.right, "right")):
+            if child is not None:
+                stack.append((child, depth + 1, obj, child_side))
+
+    if fileobj is not None:
+        json.dump(result["root"], fileobj)
+        return None
+
+    return json.dumps(result["root"])
+
+
+def export_svg(avl: avl.AVL, path: str, max_depth: Optional[int] = None,
+               subtree: Optional[int] = None) -> None:
+    """Save tree as SVG image"""
+    with open(path, "w") as svg_file:
+        svg_file.write(tree_layout.to_svg(_layout(avl, max_depth, subtree)))
+
+
+def export_dot(avl: avl.AVL, path: str, max_depth: Optional[int] = None,
+               subtree: Optional[int] = None) -> None:
+    """Save tree as Graphviz DOT graph"""
+    with open(path, "w") as dot_file:
+        dot_file.write(tree_layout.to_dot(_layout(avl, max_depth, subtree)))
+
+
+def _import_pyplot():
+    """Import pyplot on first use, matplotlib is an optional dependency"""
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError as error:
+        raise ImportError("Plotting requires matplotlib, install it with "
+                          "`pip install -r requirements-plot.txt`") from error
+
+    return plt
+
+
+def _root(avl: avl.AVL, subtree: Optional[int]) -> Optional[avl.AVL.Node]:
+    """Get root of whole tree or node with key `subtree`"""
+    root = avl.raw()
+    if subtree is not None:
+        root = tree_layout.find_node(root, subtree)
+        if root is None:
+            raise ValueError(f"Key {subtree} is not in tree!")
+
+    return root
+
+
+def _layout(avl: avl.AVL, max_depth: Optional[int], subtree: Optional[int]) -> tree_layout.Layout:
+    """Calculate layout of whole tree or subtree of node with key `subtree`"""
+    return tree_layout.compute_layout(_root(avl, subtree), max_depth)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visualize AVL tree")
+    parser.add_argument("--format", choices=["plot", "text", "json", "svg", "dot"],
+                        default="plot")
+    parser.add_argument("--output", help="output file for plot, svg and dot formats")
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--subtree", type=int, help="key of subtree root")
+    args = parser.parse_args()
+
+    # Example of tree visualization
+    avl = avl.AVL()
+
+    print("Введите натуральные числа (элементы дерева) через пробел:", file=sys.stderr)
+    keys = list(map(int, input().split()))
+
+    for key in keys:
+        avl.insert(key)
+
+    if args.format == "plot":
+        plot_tree(avl, args.max_depth, args.subtree, path=args.output)
+    elif args.format == "text":
+        print(render_text(avl, args.max_depth, args.subtree))
+    elif args.format == "json":
+        print(dump_json(avl, max_depth=args.max_depth, subtree=args.subtree))
+    elif args.output is None:
+        parser.error(f"--output is required for {args.format} format")
+    elif args.format == "svg":
+        export_svg(avl, args.output, args.max_depth, args.subtree)
+    else:
+        export_dot(avl, args.output, args.max_depth, args.subtree)
@@ -0,0 +1,63 @@
+import io
+import json
+import sys
+import unittest
+from avl import AVL
+import tree_visualizer
+
+class TestTreeVisualizer(unittest.TestCase):
+
+    def setUp(self):
+        self.avl = AVL()
+        for key in [10, 5, 20, 15, 30, 25]:
+            self.avl.insert(key)
+
+    def test_no_matplotlib_import(self):
+        """Module can be imported without matplotlib"""
+        self.assertNotIn("matplotlib.pyplot", sys.modules)
+
+    def test_render_text(self):
+        """Text rendering of tree"""
+        expected = "\n".join([
+            "    /-- 30",
+            "    |   \\-- 25",
+            "20",
+            "    |   /-- 15",
+            "    \\-- 10",
+            "        \\-- 5",
+        ])
+        self.assertEqual(tree_visualizer.render_text(self.avl), expected)
+
+        unicode_text = tree_visualizer.render_text(self.avl, unicode=True)
+        self.assertIn("┌── 30", unicode_text)
+
+    def test_render_text_limits(self):
+        """Depth limited and subtree text rendering"""
+        self.assertEqual(tree_visualizer.render_text(self.avl, max_depth=1), "20 ...")
+        self.assertEqual(tree_visualizer.render_text(self.avl, subtree=30),
+                         "30\n    \\-- 25")
+        self.assertEqual(tree_visualizer.render_text(AVL()), "")
+
+        with self.assertRaises(ValueError):
+            tree_visualizer.render_text(self.avl, subtree=100)
+
+    def test_dump_json(self):
+        """JSON dump contains nested nodes"""
+        tree = json.loads(tree_visualizer.dump_json(self.avl))
+
+        self.assertEqual(tree["key"], 20)
+        self.assertEqual(tree["height"], 3)
+        self.assertEqual(tree["left"]["key"], 10)
+        self.assertEqual(tree["left"]["right"]["key"], 15)
+        self.assertEqual(tree["right"]["left"]["key"], 25)
+
+        tree = json.loads(tree_visualizer.dump_json(self.avl, max_depth=2))
+        self.assertTrue(tree["left"]["truncated"])
+        self.assertIsNone(tree["left"]["right"])
+
+        output = io.StringIO()
+        tree_visualizer.dump_json(AVL(), output)
+        self.assertEqual(json.loads(output.getvalue()), None)
+
+if __name__ == '__main__':
+    unittest.main()
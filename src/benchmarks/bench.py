@@ -0,0 +1,582 @@
+"""
+Benchmark suite for AVL tree and HashTable.
+
+Compares custom data structures with built-in baselines (`dict`, `set`,
+`bisect` on sorted list and `heapq`) on different key distributions.
+Results are written as JSON so runs can be diffed with `--compare`.
+
+Examples:
+    python bench.py --sizes 1000 10000 --output new.json
+    python bench.py --compare old.json new.json
+"""
+import argparse
+import bisect
+import gc
+import heapq
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, "associative_array"))
+sys.path.insert(0, os.path.join(SRC_DIR, "avl"))
+
+from avl import AVL
+from hash_table import HashTable
+from int_hash_table import IntHashTable
+
+DEFAULT_SIZES    = [10**3, 10**4, 10**5]
+DEFAULT_REPEAT   = 3
+DEFAULT_SEED     = 2025
+ZIPF_EXPONENT    = 1.1
+
+# Every key of "collision" distribution hashes to the same bucket, so hash
+# table operations are O(n) each. Such cases are skipped above this size.
+COLLISION_LIMIT  = 10**4
+
+#===================#
+# KEY DISTRIBUTIONS #
+#===================#
+def uniform_keys(size: int, rnd: random.Random) -> List[int]:
+    """Uniformly distributed natural keys"""
+    return [rnd.randrange(2**31) for _ in range(size)]
+
+def sorted_keys(size: int, rnd: random.Random) -> List[int]:
+    """Already sorted keys, worst case for naive BST"""
+    return list(range(size))
+
+def zipf_keys(size: int, rnd: random.Random) -> List[int]:
+    """Skewed keys with Zipf distribution, a lot of duplicates"""
+    weights = [1 / rank ** ZIPF_EXPONENT for rank in range(1, size + 1)]
+    cum_weights = list(itertools.accumulate(weights))
+
+    return rnd.choices(range(size), cum_weights=cum_weights, k=size)
+
+def collision_keys(size: int, rnd: random.Random) -> List[int]:
+    """
+    Adversarial keys for hash() based tables.
+
+    For int `x` CPython uses `x mod sys.hash_info.modulus` as hash value,
+    so all multiples of modulus have hash 0 and fall into one chain.
+    """
+    modulus = sys.hash_info.modulus
+    keys = [i * modulus for i in range(size)]
+    rnd.shuffle(keys)
+
+    return keys
+
+DISTRIBUTIONS = {
+    "uniform":   uniform_keys,
+    "sorted":    sorted_keys,
+    "zipf":      zipf_keys,
+    "collision": collision_keys,
+}
+
+#===============#
+# AVL WORKLOADS #
+#===============#
+# Each workload takes keys and returns pair of callables (setup, run):
+# `setup()` builds untimed initial state, `run(state)` is timed.
+def _avl_from(keys: List[int]) -> AVL:
+    tree = AVL()
+    for key in keys:
+        tree.insert(key)
+    return tree
+
+def avl_insert(keys):
+    return (lambda: AVL(),
+            lambda tree: [tree.insert(key) for key in keys])
+
+def avl_lookup(keys):
+    return (lambda: _avl_from(keys),
+            lambda tree: [key in tree for key in keys])
+
+def avl_remove(keys):
+    return (lambda: _avl_from(keys),
+            lambda tree: [tree.remove(key) for key in keys])
+
+def avl_iterate(keys):
+    return (lambda: _avl_from(keys),
+            lambda tree: tree.data())
+
+def avl_split(keys):
+    pivot = sorted(keys)[len(keys) // 2]
+    return (lambda: _avl_from(keys),
+            lambda tree: tree.split(pivot))
+
+def avl_merge(keys):
+    half = len(keys) // 2
+    return (lambda: (_avl_from(keys[:half]), _avl_from(keys[half:])),
+            lambda trees: trees[0] + trees[1])
+
+#======================#
+# HASH TABLE WORKLOADS #
+#======================#
+def _table_from(keys: List[int], table_class=HashTable):
+    table = table_class()
+    for key in keys:
+        table[key] = key
+    return table
+
+def table_set(keys, table_class=HashTable):
+    def run(table):
+        for key in keys:
+            table[key] = key
+    return table_class, run
+
+def table_get(keys, table_class=HashTable):
+    return (lambda: _table_from(keys, table_class),
+            lambda table: [table[key] for key in keys])
+
+def table_pop(keys, table_class=HashTable):
+    unique = list(dict.fromkeys(keys))
+    return (lambda: _table_from(unique, table_class),
+            lambda table: [table.pop(key) for key in unique])
+
+def table_resize(keys):
+    return (lambda: _table_from(keys),
+            lambda table: table._resize())
+
+def int_table_resize(keys):
+    return (lambda: _table_from(keys, IntHashTable),
+            lambda table: table._rebuild(table.capacity() * 2))
+
+#====================#
+# BASELINE WORKLOADS #
+#====================#
+def set_insert(keys):
+    return set, lambda s: [s.add(key) for key in keys]
+
+def set_lookup(keys):
+    return (lambda: set(keys),
+            lambda s: [key in s for key in keys])
+
+def set_remove(keys):
+    return (lambda: set(keys),
+            lambda s: [s.discard(key) for key in keys])
+
+def set_iterate(keys):
+    return (lambda: set(keys),
+            lambda s: sorted(s))
+
+def bisect_insert(keys):
+    return list, lambda lst: [bisect.insort(lst, key) for key in keys]
+
+def bisect_lookup(keys):
+    def run(lst):
+        for key in keys:
+            i = bisect.bisect_left(lst, key)
+            _ = i < len(lst) and lst[i] == key
+    return (lambda: sorted(keys)), run
+
+def bisect_remove(keys):
+    def run(lst):
+        for key in keys:
+            i = bisect.bisect_left(lst, key)
+            if i < len(lst) and lst[i] == key:
+                del lst[i]
+    return (lambda: sorted(keys)), run
+
+def bisect_iterate(keys):
+    return (lambda: sorted(keys)), lambda lst: list(lst)
+
+def bisect_split(keys):
+    pivot = sorted(keys)[len(keys) // 2]
+    def run(lst):
+        return lst[:bisect.bisect_left(lst, pivot)], \
+               lst[bisect.bisect_right(lst, pivot):]
+    return (lambda: sorted(keys)), run
+
+def bisect_merge(keys):
+    half = len(keys) // 2
+    return (lambda: (sorted(keys[:half]), sorted(keys[half:]))), \
+           (lambda lists: sorted(lists[0] + lists[1]))
+
+def heapq_insert(keys):
+    return list, lambda heap: [heapq.heappush(heap, key) for key in keys]
+
+def heapq_iterate(keys):
+    def setup():
+        heap = list(keys)
+        heapq.heapify(heap)
+        return heap
+    return setup, lambda heap: [heapq.heappop(heap) for _ in range(len(heap))]
+
+def heapq_merge(keys):
+    half = len(keys) // 2
+    return (lambda: (sorted(keys[:half]), sorted(keys[half:]))), \
+           (lambda lists: list(heapq.merge(lists[0], lists[1])))
+
+def dict_set(keys):
+    def run(d):
+        for key in keys:
+            d[key] = key
+    return dict, run
+
+def dict_get(keys):
+    return (lambda: dict.fromkeys(keys)), \
+           (lambda d: [d[key] for key in keys])
+
+def dict_pop(keys):
+    unique = list(dict.fromkeys(keys))
+    return (lambda: dict.fromkeys(unique)), \
+           (lambda d: [d.pop(key) for key in unique])
+
+def dict_resize(keys):
+    # dict has no explicit resize, rebuilding is the closest equivalent
+    return (lambda: dict.fromkeys(keys)), lambda d: dict(d)
+
+WORKLOADS: Dict[str, Dict[str, Callable]] = {
+    "AVL": {
+        "insert":  avl_insert,
+        "lookup":  avl_lookup,
+        "remove":  avl_remove,
+        "iterate": avl_iterate,
+        "split":   avl_split,
+        "merge":   avl_merge,
+    },
+    "set": {
+        "insert":  set_insert,
+        "lookup":  set_lookup,
+        "remove":  set_remove,
+        "iterate": set_iterate,
+    },
+    "bisect": {
+        "insert":  bisect_insert,
+        "lookup":  bisect_lookup,
+        "remove":  bisect_remove,
+        "iterate": bisect_iterate,
+        "split":   bisect_split,
+        "merge":   bisect_merge,
+    },
+    "heapq": {
+        "insert":  heapq_insert,
+        "iterate": heapq_iterate,
+        "merge":   heapq_merge,
+    },
+    "HashTable": {
+        "set":    table_set,
+        "get":    table_get,
+        "pop":    table_pop,
+        "resize": table_resize,
+    },
+    "IntHashTable": {
+        "set":    lambda keys: table_set(keys, IntHashTable),
+        "get":    lambda keys: table_get(keys, IntHashTable),
+        "pop":    lambda keys: table_pop(keys, IntHashTable),
+        "resize": int_table_resize,
+    },
+    "dict": {
+        "set":    dict_set,
+        "get":    dict_get,
+        "pop":    dict_pop,
+        "resize": dict_resize,
+    },
+}
+
+# Structures which suffer from hash collisions
+HASHED_STRUCTURES = {"HashTable", "set", "dict"}
+
+# Structures which store keys in 64-bit arrays, keys of "collision"
+# distribution don't fit into them
+INT64_STRUCTURES = {"IntHashTable"}
+
+#========#
+# RUNNER #
+#========#
+def measure(setup: Callable, run: Callable, repeat: int) -> List[float]:
+    """
+    Time `run(setup())` `repeat` times, setup is not included.
+
+    Garbage collector is disabled during measurement, as `timeit` does.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(state)
+            timings.append(time.perf_counter() - start)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return timings
+
+def run_suite(sizes: List[int],
+              distributions: List[str],
+              structures: List[str],
+              operations: Optional[List[str]] = None,
+              repeat: int = DEFAULT_REPEAT,
+              seed: int = DEFAULT_SEED,
+              collision_limit: int = COLLISION_LIMIT,
+              verbose: bool = False) -> dict:
+    """Run all selected benchmarks and return JSON-serializable report"""
+    results = []
+
+    for distribution in distributions:
+        for size in sizes:
+            # Same keys for every structure to keep comparison fair
+            keys = DISTRIBUTIONS[distribution](size, random.Random(seed))
+
+            for structure in structures:
+                if distribution == "collision" and \
+                   structure in HASHED_STRUCTURES and size > collision_limit:
+                    continue
+                if distribution == "collision" and structure in INT64_STRUCTURES:
+                    continue
+
+                for operation, workload in WORKLOADS[structure].items():
+                    if operations and operation not in operations:
+                        continue
+
+                    setup, run = workload(keys)
+                    timings = measure(setup, run, repeat)
+                    best = min(timings)
+
+                    results.append({
+                        "structure":    structure,
+                        "operation":    operation,
+                        "distribution": distribution,
+                        "size":         size,
+                        "best":         best,
+                        "median":       statistics.median(timings),
+                        "ns_per_op":    best / size * 1e9,
+                    })
+
+                    if verbose:
+                        print(f"{structure:>12} {operation:<8} {distribution:<9} "
+                              f"{size:>9} {best:.6f}s", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python":         platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform":       platform.platform(),
+            "repeat":         repeat,
+            "seed":           seed,
+        },
+        "results": results,
+    }
+
+#===============#
+# MEMORY RUNNER #
+#===============#
+def traced_peak(func: Callable) -> (object, int):
+    """
+    Call `func` under tracemalloc.
+
+    Returns result of call and peak amount of memory allocated during call
+    on top of memory which was already allocated before it
+    """
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+
+    return result, peak - before
+
+def _heap_from(keys: List[int]) -> List[int]:
+    heap = list(keys)
+    heapq.heapify(heap)
+    return heap
+
+MEMORY_BUILDERS: Dict[str, Callable] = {
+    "AVL":          _avl_from,
+    "HashTable":    _table_from,
+    "IntHashTable": lambda keys: _table_from(keys, IntHashTable),
+    "set":          set,
+    "bisect":       sorted,
+    "heapq":        _heap_from,
+    "dict":         lambda keys: {key: key for key in keys},
+}
+
+def run_memory_suite(sizes: List[int],
+                     distributions: List[str],
+                     structures: List[str],
+                     seed: int = DEFAULT_SEED,
+                     collision_limit: int = COLLISION_LIMIT,
+                     verbose: bool = False) -> dict:
+    """
+    Measure memory footprint with tracemalloc.
+
+    For every structure `build` row holds memory traced after building it
+    from keys. Custom structures also get `reported` bytes from their
+    `memory_usage()` and peak memory of their heavy operations:
+    `HashTable._resize()`, `AVL.split()` and `AVL.__add__()`
+    """
+    results = []
+
+    def add_row(structure, operation, distribution, size, traced, reported=None):
+        row = {
+            "structure":       structure,
+            "operation":       operation,
+            "distribution":    distribution,
+            "size":            size,
+            "bytes":           traced,
+            "bytes_per_entry": traced / size,
+        }
+        if reported is not None:
+            row["reported"] = reported
+            row["reported_per_entry"] = reported / size
+        results.append(row)
+
+        if verbose:
+            print(f"{structure:>12} {operation:<8} {distribution:<9} "
+                  f"{size:>9} {traced / size:.1f} B/entry", file=sys.stderr)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    try:
+        for distribution in distributions:
+            for size in sizes:
+                keys = DISTRIBUTIONS[distribution](size, random.Random(seed))
+
+                for structure in structures:
+                    if distribution == "collision" and \
+                       structure in HASHED_STRUCTURES and size > collision_limit:
+                        continue
+                    if distribution == "collision" and structure in INT64_STRUCTURES:
+                        continue
+
+                    # Memory which stays allocated after the build
+                    gc.collect()
+                    before, _ = tracemalloc.get_traced_memory()
+                    obj = MEMORY_BUILDERS[structure](keys)
+                    traced = tracemalloc.get_traced_memory()[0] - before
+
+                    reported = obj.memory_usage() if hasattr(obj, "memory_usage") else None
+                    add_row(structure, "build", distribution, size, traced, reported)
+
+                    if structure == "HashTable":
+                        peak = traced_peak(obj._resize)[1]
+                        add_row(structure, "resize", distribution, size, peak)
+                    elif structure == "IntHashTable":
+                        peak = traced_peak(lambda: obj._rebuild(obj.capacity() * 2))[1]
+                        add_row(structure, "resize", distribution, size, peak)
+                    elif structure == "AVL":
+                        pivot = sorted(keys)[size // 2]
+                        peak = traced_peak(lambda: obj.split(pivot))[1]
+                        add_row(structure, "split", distribution, size, peak)
+                        peak = traced_peak(lambda: obj + obj)[1]
+                        add_row(structure, "merge", distribution, size, peak)
+
+                    del obj
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return {
+        "meta": {
+            "python":         platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform":       platform.platform(),
+            "seed":           seed,
+            "mode":           "memory",
+        },
+        "results": results,
+    }
+
+def compare(old: dict, new: dict, threshold: float) -> List[dict]:
+    """
+    Compare two reports by best time (or by traced bytes for memory reports).
+
+    Returns rows which exist in both reports with `ratio` = new / old,
+    rows with ratio above `threshold` are marked as regressions.
+    """
+    def key(row):
+        return (row["structure"], row["operation"],
+                row["distribution"], row["size"])
+
+    def metric(row):
+        return row["best"] if "best" in row else row["bytes"]
+
+    old_rows = {key(row): row for row in old["results"]}
+    rows = []
+
+    for row in new["results"]:
+        old_row = old_rows.get(key(row))
+        if old_row is None or metric(old_row) == 0:
+            continue
+
+        ratio = metric(row) / metric(old_row)
+        rows.append({
+            "structure":    row["structure"],
+            "operation":    row["operation"],
+            "distribution": row["distribution"],
+            "size":         row["size"],
+            "old":          metric(old_row),
+            "new":          metric(row),
+            "ratio":        ratio,
+            "regression":   ratio > threshold,
+        })
+
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="amounts of keys (up to 10^7)")
+    parser.add_argument("--distributions", nargs="+", choices=list(DISTRIBUTIONS),
+                        default=list(DISTRIBUTIONS))
+    parser.add_argument("--structures", nargs="+", choices=list(WORKLOADS),
+                        default=list(WORKLOADS))
+    parser.add_argument("--operations", nargs="+",
+                        help="run only specified operations")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--collision-limit", type=int, default=COLLISION_LIMIT,
+                        help="max size of collision distribution for hash tables")
+    parser.add_argument("--memory", action="store_true",
+                        help="measure memory with tracemalloc instead of time")
+    parser.add_argument("--output", help="file for JSON report (stdout by default)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two JSON reports instead of running benchmarks")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="new/old ratio treated as regression")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            rows = compare(json.load(old_file), json.load(new_file), args.threshold)
+
+        for row in rows:
+            mark = "REGRESSION" if row["regression"] else ""
+            print(f"{row['structure']:>9} {row['operation']:<8} {row['distribution']:<9} "
+                  f"{row['size']:>9} {row['old']:.6g} -> {row['new']:.6g} "
+                  f"x{row['ratio']:.2f} {mark}")
+
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    if args.memory:
+        report = run_memory_suite(args.sizes, args.distributions, args.structures,
+                                  args.seed, args.collision_limit, args.verbose)
+    else:
+        report = run_suite(args.sizes, args.distributions, args.structures,
+                           args.operations, args.repeat, args.seed,
+                           args.collision_limit, args.verbose)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
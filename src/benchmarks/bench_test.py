@@ -0,0 +1,85 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+import bench
+
+class TestBench(unittest.TestCase):
+
+    def test_distributions(self):
+        """Each distribution produces requested amount of natural keys"""
+        for name, make_keys in bench.DISTRIBUTIONS.items():
+            keys = make_keys(100, bench.random.Random(1))
+            self.assertEqual(len(keys), 100, name)
+            self.assertTrue(all(key >= 0 for key in keys), name)
+
+        # All adversarial keys share one hash value
+        keys = bench.collision_keys(10, bench.random.Random(1))
+        self.assertEqual(len({hash(key) for key in keys}), 1)
+
+    def test_run_suite(self):
+        """Small run covers all structures and operations"""
+        report = bench.run_suite(sizes=[50], distributions=["uniform"],
+                                 structures=list(bench.WORKLOADS), repeat=1)
+
+        self.assertIn("meta", report)
+        operations = {(row["structure"], row["operation"])
+                      for row in report["results"]}
+        expected = {(structure, operation)
+                    for structure, workloads in bench.WORKLOADS.items()
+                    for operation in workloads}
+        self.assertEqual(operations, expected)
+
+        # Report must be JSON serializable
+        json.dumps(report)
+
+    def test_collision_limit(self):
+        """Hash based structures are skipped on big collision inputs"""
+        report = bench.run_suite(sizes=[50], distributions=["collision"],
+                                 structures=["HashTable", "AVL"], repeat=1,
+                                 collision_limit=10)
+        structures = {row["structure"] for row in report["results"]}
+        self.assertEqual(structures, {"AVL"})
+
+    def test_memory_suite(self):
+        """Memory mode reports bytes per entry and peaks of heavy operations"""
+        report = bench.run_memory_suite(sizes=[200], distributions=["uniform"],
+                                        structures=["AVL", "HashTable", "dict"])
+
+        rows = {(row["structure"], row["operation"]): row
+                for row in report["results"]}
+        self.assertEqual(set(rows), {("AVL", "build"), ("AVL", "split"),
+                                     ("AVL", "merge"), ("HashTable", "build"),
+                                     ("HashTable", "resize"), ("dict", "build")})
+        self.assertGreater(rows[("AVL", "build")]["bytes_per_entry"], 0)
+        self.assertIn("reported", rows[("HashTable", "build")])
+        self.assertNotIn("reported", rows[("dict", "build")])
+        self.assertFalse(bench.tracemalloc.is_tracing())
+
+    def test_compare(self):
+        """Regression is reported when new time exceeds threshold"""
+        row = {"structure": "AVL", "operation": "insert",
+               "distribution": "uniform", "size": 10}
+        old = {"results": [dict(row, best=1.0)]}
+        new = {"results": [dict(row, best=1.5)]}
+
+        rows = bench.compare(old, new, threshold=1.1)
+        self.assertEqual(len(rows), 1)
+        self.assertAlmostEqual(rows[0]["ratio"], 1.5)
+        self.assertTrue(rows[0]["regression"])
+        self.assertFalse(bench.compare(old, new, threshold=2.0)[0]["regression"])
+
+    def test_main_output(self):
+        """CLI prints JSON report"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = bench.main(["--sizes", "20", "--repeat", "1",
+                               "--structures", "dict",
+                               "--distributions", "sorted"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(len(json.loads(output.getvalue())["results"]), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Ordered map of natural keys built from HashTable and AVL tree.
+
+Hash table answers point queries (get, in) in O(1), AVL tree holds the
+same keys in order for iteration, range queries, min/max and rank.
+"""
+import os
+import sys
+from typing import Iterator, List, Tuple
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, "associative_array"))
+sys.path.insert(0, os.path.join(SRC_DIR, "avl"))
+
+from avl import AVL
+from hash_table import HashTable
+
+
+class OrderedIndex:
+    """
+    Map with O(1) point lookups and ordered scans
+
+    Table maps key to value and tree holds every key exactly once. Table
+    doesn't keep references to tree nodes: AVL removal moves keys between
+    nodes, so such references would become stale. Every modification
+    changes both sides, and keys are looked up in tree by key.
+    """
+    def __init__(self, initial_capacity: int = 8):
+        self._table = HashTable(initial_capacity)
+        self._tree  = AVL()
+
+    #=========================#
+    # CLASS INTERFACE METHODS #
+    #=========================#
+    def get(self, key: int, default_value=None):
+        """Get value by key in O(1), `default_value` if there is no such key"""
+        return self._table.get(key, default_value)
+
+    def pop(self, key: int):
+        """Remove key in O(log(n)) and return its value"""
+        # Table raises KeyError before anything is changed
+        value = self._table[key]
+
+        self._table.pop(key)
+        self._tree.remove(key)
+        return value
+
+    def keys(self) -> List[int]:
+        """Get keys in ascending order"""
+        return self._tree.data()
+
+    def values(self) -> list:
+        """Get values in ascending order of their keys"""
+        table = self._table
+        return [table[key] for key in self._tree]
+
+    def items(self) -> List[Tuple[int, object]]:
+        """Get key-value pairs in ascending order of keys"""
+        table = self._table
+        return [(key, table[key]) for key in self._tree]
+
+    def range(self, lo: int, hi: int) -> List[Tuple[int, object]]:
+        """Get sorted key-value pairs with keys `k` such that lo <= k < hi"""
+        table = self._table
+        return [(key, table[key]) for key in self._tree.range(lo, hi)]
+
+    def min(self) -> int:
+        """Get min key in O(1)"""
+        return self._tree.min()
+
+    def max(self) -> int:
+        """Get max key in O(1)"""
+        return self._tree.max()
+
+    def rank(self, key: int) -> int:
+        """Count keys less than `key`, see AVL.rank()"""
+        return self._tree.rank(key)
+
+    def clear(self) -> None:
+        """Remove all keys"""
+        self._table.clear()
+        self._tree.clear()
+
+    def validate(self) -> bool:
+        """Validate tree and check that tree and table hold the same unique keys"""
+        if not self._tree.validate() or len(self._tree) != len(self._table):
+            return False
+
+        previous = None
+        for key in self._tree:
+            if key == previous or key not in self._table:
+                return False
+            previous = key
+
+        return True
+
+    #===============#
+    # MAGIC METHODS #
+    #===============#
+    def __len__(self) -> int:
+        """Get amount of keys"""
+        return len(self._table)
+
+    def __bool__(self) -> bool:
+        """Check on True/False"""
+        return bool(self._tree)
+
+    def __iter__(self) -> Iterator[int]:
+        """Lazily iterate over keys in ascending order"""
+        return iter(self._tree)
+
+    def __contains__(self, key: int) -> bool:
+        """Check key in O(1)"""
+        return key in self._table
+
+    def __getitem__(self, key: int):
+        """Get value by key in O(1), overload []"""
+        return self._table[key]
+
+    def __setitem__(self, key: int, value) -> None:
+        """Set value by key, new keys are inserted in O(log(n)), overload []"""
+        if key in self._table:
+            self._table[key] = value
+            return
+
+        # Tree rejects keys which are not natural numbers before table is changed
+        self._tree.insert(key)
+        self._table[key] = value
+
+    def __str__(self) -> str:
+        """Get string representation with keys in ascending order"""
+        return '{' + ", ".join(f"{key}: {value}" for key, value in self.items()) + '}'
+
+
+if __name__ == "__main__":
+    index = OrderedIndex()
+
+    for key in [10, 3, 7, 15, 1]:
+        index[key] = f"value{key}"
+
+    print(index)
+    print(index.range(3, 11), index.rank(7), index.min(), index.max())
@@ -0,0 +1,84 @@
+import random
+import unittest
+
+from ordered_index import OrderedIndex
+
+class TestOrderedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = OrderedIndex()
+
+    def test_set_and_get(self):
+        """Point operations"""
+        for key in [10, 3, 7]:
+            self.index[key] = str(key)
+
+        self.assertEqual(self.index[7], "7")
+        self.assertEqual(self.index.get(8, "none"), "none")
+        self.assertTrue(3 in self.index)
+        self.assertFalse(4 in self.index)
+        with self.assertRaises(KeyError):
+            _ = self.index[4]
+
+        # Update doesn't duplicate key in tree
+        self.index[7] = "new"
+        self.assertEqual(self.index[7], "new")
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.keys(), [3, 7, 10])
+
+        # Bad key changes nothing
+        with self.assertRaises(ValueError):
+            self.index[-1] = "negative"
+        self.assertFalse(-1 in self.index)
+        self.assertTrue(self.index.validate())
+
+    def test_pop(self):
+        """Removal keeps table and tree consistent"""
+        for key in range(20):
+            self.index[key] = key * 10
+
+        self.assertEqual(self.index.pop(5), 50)
+        self.assertEqual(self.index.pop(0), 0)
+        with self.assertRaises(KeyError):
+            self.index.pop(5)
+
+        self.assertFalse(5 in self.index)
+        self.assertEqual(len(self.index), 18)
+        self.assertEqual(self.index.min(), 1)
+        self.assertTrue(self.index.validate())
+
+    def test_ordered_queries(self):
+        """Iteration, ranges, min, max and rank follow key order"""
+        for key in [50, 20, 80, 10, 30]:
+            self.index[key] = -key
+
+        self.assertEqual(list(self.index), [10, 20, 30, 50, 80])
+        self.assertEqual(self.index.values(), [-10, -20, -30, -50, -80])
+        self.assertEqual(self.index.items()[0], (10, -10))
+        self.assertEqual(self.index.range(20, 50), [(20, -20), (30, -30)])
+        self.assertEqual((self.index.min(), self.index.max()), (10, 80))
+        self.assertEqual([self.index.rank(key) for key in [0, 10, 25, 80, 100]], [0, 0, 2, 4, 5])
+        self.assertEqual(str(self.index), "{10: -10, 20: -20, 30: -30, 50: -50, 80: -80}")
+
+    def test_random_operations(self):
+        """Index behaves like sorted dict"""
+        rnd = random.Random(3)
+        expected = {}
+
+        for i in range(2000):
+            key = rnd.randrange(200)
+            if rnd.random() < 0.6:
+                self.index[key] = i
+                expected[key] = i
+            elif key in expected:
+                self.assertEqual(self.index.pop(key), expected.pop(key))
+
+        self.assertEqual(self.index.items(), sorted(expected.items()))
+        self.assertTrue(self.index.validate())
+
+        self.index.clear()
+        self.assertFalse(self.index)
+        self.assertEqual(self.index.keys(), [])
+
+if __name__ == "__main__":
+    unittest.main()